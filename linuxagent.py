@@ -31,6 +31,11 @@ def parse_arguments():
         help="启用调试模式", 
         action="store_true"
     )
+    parser.add_argument(
+        "--no-cache", 
+        help="禁用API响应缓存", 
+        action="store_true"
+    )
     parser.add_argument(
         "-v", "--version", 
         help="显示版本信息", 
@@ -56,19 +61,20 @@ def main():
         print(f"您可以从 config.yaml.example 复制并修改创建配置文件")
         return 1
     
-    log_level = logging.DEBUG if args.debug else getattr(logging, config.logging.level)
+    logging_config = config.logging
+    log_level = logging.DEBUG if args.debug else getattr(logging, logging_config.level)
     logger = setup_logger(
         level=log_level,
-        log_file=os.path.expanduser(config.logging.file),
-        max_size_mb=config.logging.max_size_mb,
-        backup_count=config.logging.backup_count
+        log_file=os.path.expanduser(logging_config.file),
+        max_size_mb=logging_config.max_size_mb,
+        backup_count=logging_config.backup_count
     )
     
     logger.info("LinuxAgent启动中...")
     
     ui = ConsoleUI(config.ui)
     
-    agent = Agent(config=config, ui=ui, logger=logger)
+    agent = Agent(config=config, ui=ui, logger=logger, use_cache=not args.no_cache)
     
     try:
         agent.run()
@@ -11,75 +11,227 @@ import sys
 import time
 import logging
 import re
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 
 from .config import Config
 from .ui import ConsoleUI
 from .deepseek_api import DeepSeekAPI
 from .command_executor import CommandExecutor
+from .response_cache import ResponseCache
+
+
+# 预编译的正则表达式，避免每次处理用户输入时重复编译
+_EDIT_PATTERNS = tuple(re.compile(p) for p in (
+    r'使用\s+(\w+)\s+编辑\s+([^\s]+)(\s+文件)?',
+    r'用\s+(\w+)\s+打开\s+([^\s]+)(\s+文件)?',
+    r'编辑\s+([^\s]+)(\s+文件)?(\s+用\s+(\w+))?'
+))
+
+_WEB_PAGE_RE = re.compile(
+    r'(?:创建|制作|开发|编写).*?(?:网页|页面|html|登录页|注册页)',
+    re.IGNORECASE
+)
+
+_CREATION_RE = re.compile(r'(?:echo .* > |cat > |touch |printf .* > ).+\.html')
+
+_EXIT_COMMANDS = frozenset({"exit", "quit", "bye"})
+
+_SIMPLE_CMDS = frozenset({
+    "ls", "pwd", "cd", "cat", "echo", "mkdir", "touch", "cp", "mv", "rm", "ps", "df", "du"
+})
+
+# 保持为元组，便于直接传给 str.startswith
+_SUSPICIOUS_PREFIXES = ("###", "##", "#", "解释:", "命令目的:", "安全性:", "是否是危险命令:")
+
+_EDITORS = frozenset({"vim", "vi", "nano", "emacs"})
+_EDITOR_RE = re.compile(r'\b(?:vim|vi|nano|emacs)\b')
+
+_COMPLEX_SEP_RE = re.compile(r'&&|;')
+_PKG_RE = re.compile(r'\b(?:dnf|yum|apt|apt-get|pacman|zypper)\s+(?:update|upgrade|install)\b')
+
+# 常见只读查询到命令的映射，只匹配完整的简短说法，避免误判更复杂的需求
+_INTENT_MAP = tuple((re.compile(pattern, re.IGNORECASE), command, explanation) for pattern, command, explanation in (
+    (r'(?:查看|显示|检查)?(?:一下)?(?:系统)?磁盘(?:使用|占用|空间)(?:情况)?', "df -h", "查看磁盘使用情况"),
+    (r'(?:查看|显示|检查)?(?:一下)?(?:系统)?内存(?:使用|占用)?(?:情况)?', "free -h", "查看内存使用情况"),
+    (r'(?:查看|显示|列出)?(?:一下)?(?:所有|当前)?进程(?:列表)?', "ps aux", "列出所有进程"),
+    (r'(?:查看|显示|列出)?(?:一下)?(?:所有)?网络接口(?:信息)?', "ip addr", "查看网络接口信息"),
+    (r'(?:查看|显示)?(?:一下)?(?:系统)?(?:运行时间|负载)', "uptime", "查看系统运行时间和负载"),
+    (r'(?:查看|显示)?(?:一下)?(?:当前)?登录(?:的)?用户', "who", "查看当前登录用户"),
+    (r'(?:查看|显示)?(?:一下)?(?:系统)?内核版本', "uname -r", "查看内核版本"),
+    (r'(?:查看|显示)?(?:一下)?主机名', "hostname", "查看主机名"),
+    (r'(?:查看|显示)?(?:一下)?(?:系统)?(?:发行版|版本)(?:信息)?', "cat /etc/os-release", "查看系统版本信息"),
+    (r'(?:查看|显示)?(?:一下)?cpu(?:信息)?', "lscpu", "查看CPU信息"),
+    (r'(?:查看|显示|列出)?(?:一下)?(?:块设备|磁盘分区|分区)(?:信息)?', "lsblk", "列出块设备和分区"),
+    (r'(?:查看|显示|列出)?(?:一下)?(?:监听|开放)(?:的)?端口', "ss -tuln", "查看监听中的端口"),
+    (r'(?:查看|显示)?(?:一下)?挂载(?:点|信息)', "findmnt", "查看文件系统挂载信息"),
+    (r'(?:show |check )?disk (?:usage|space)', "df -h", "查看磁盘使用情况"),
+    (r'(?:show |check )?(?:memory|mem)(?: usage)?', "free -h", "查看内存使用情况"),
+    (r'(?:show |list )?(?:all )?processes', "ps aux", "列出所有进程"),
+    (r'(?:show |list )?network interfaces', "ip addr", "查看网络接口信息"),
+    (r'(?:show )?(?:listening|open) ports', "ss -tuln", "查看监听中的端口"),
+))
+
+# 系统信息缓存有效期(秒)
+_SYSINFO_TTL = 60.0
+
+_NGINX_PATH_RE = re.compile(r'nginx|/var/www/')
+_LOGIN_RE = re.compile(r'login|登录|注册', re.IGNORECASE)
+
+# API响应缓存目录
+_CACHE_DIR = "~/.cache/linuxagent"
+
+_SAVE_TO_RE = re.compile(r'保存到\s+([^\s]+)')
+_REDIRECT_RE = re.compile(r'> ([^\s;|&]+)')
+_TOUCH_RE = re.compile(r'touch ([^\s;|&]+)')
+
+
+def _head_and_tail(text: str, count: int) -> Tuple[str, str]:
+    """只定位首尾各 count 行的边界，不拆分整个输出"""
+    head_end = -1
+    for _ in range(count):
+        head_end = text.find("\n", head_end + 1)
+    
+    tail_start = len(text)
+    for _ in range(count):
+        tail_start = text.rfind("\n", 0, tail_start)
+        
+    return text[:head_end], text[tail_start + 1:]
+
+
+def _split_unquoted(command: str, separator: str) -> List[str]:
+    """按不在引号内的分隔符拆分命令，保留每一部分的原始文本"""
+    parts = []
+    start = 0
+    quote = None
+    i = 0
+    length = len(command)
+    
+    while i < length:
+        ch = command[i]
+        if ch == "\\" and quote != "'":
+            i += 2
+            continue
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif command.startswith(separator, i):
+            parts.append(command[start:i])
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+        
+    parts.append(command[start:])
+    return [part.strip() for part in parts if part.strip()]
 
 
 class Agent:
     """LinuxAgent代理类"""
     
-    def __init__(self, config: Config, ui: ConsoleUI, logger=None):
+    def __init__(self, config: Config, ui: ConsoleUI, logger=None, use_cache: bool = True):
         """初始化代理"""
         self.config = config
         self.ui = ui
         self.logger = logger or logging.getLogger("agent")
         
-        self.api = DeepSeekAPI(config.api, logger=self.logger)
+        self.cache = ResponseCache(_CACHE_DIR, enabled=use_cache, logger=self.logger)
+        self.api = DeepSeekAPI(config.api, logger=self.logger, cache=self.cache)
         self.executor = CommandExecutor(config.security, logger=self.logger)
-        self.history = []
+        self.history = deque(maxlen=config.ui.max_history)
         
-        self._check_api_availability()
-    
-    def _check_api_availability(self):
-        """检查API是否可用"""
-        self.logger.info("检查DeepSeek API可用性")
+        self._special_commands = {
+            "exit": self._request_exit,
+            "quit": self._request_exit,
+            "bye": self._request_exit,
+            "help": self._show_help,
+            "clear": self._clear_screen,
+            "history": self._show_history,
+            "config": self._show_config,
+            "invalidate": self._invalidate_cache,
+        }
         
+        self._sysinfo_cache = None
+        self._sysinfo_ts = 0.0
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="agent")
+        
+        # API可用性检测需要一次网络往返，放到后台线程中，不阻塞界面启动
+        self._api_available = None
+        self._api_rechecked = False
+        self._api_check_lock = threading.Lock()
         if not self.api.api_key:
             self.logger.warning("未设置DeepSeek API密钥")
             self.ui.show_error("未设置DeepSeek API密钥，请在配置文件中设置")
-            return False
-        
-        is_available = self.api.is_api_available()
-        if not is_available:
-            self.logger.error("DeepSeek API不可用")
-            self.ui.show_error("DeepSeek API连接失败，请检查网络和API密钥")
-            return False
-            
-        self.logger.info("DeepSeek API可用")
-        return True
+            self._api_available = False
+        else:
+            threading.Thread(target=self._check_api_availability, daemon=True).start()
+    
+    def _cached_system_info(self) -> Dict[str, Any]:
+        """获取系统信息，在有效期内复用上次的结果"""
+        now = time.monotonic()
+        if self._sysinfo_cache is None or now - self._sysinfo_ts > _SYSINFO_TTL:
+            self._sysinfo_cache = self.executor.get_system_info()
+            self._sysinfo_ts = now
+        return self._sysinfo_cache
+    
+    def _check_api_availability(self) -> bool:
+        """检查API是否可用，并记录检查结果"""
+        with self._api_check_lock:
+            self.logger.info("检查DeepSeek API可用性")
+            
+            is_available = self.api.is_api_available()
+            if is_available:
+                self.logger.info("DeepSeek API可用")
+            else:
+                self.logger.error("DeepSeek API不可用")
+                
+            self._api_available = is_available
+            return is_available
+    
+    def _request_exit(self) -> None:
+        """处理退出命令"""
+        self.logger.info("用户请求退出")
+    
+    def _show_help(self) -> None:
+        """显示帮助信息"""
+        self.logger.info("显示帮助信息")
+        self.ui.show_help()
+    
+    def _clear_screen(self) -> None:
+        """清屏"""
+        self.logger.info("清屏")
+        self.ui.clear_screen()
+    
+    def _show_history(self) -> None:
+        """显示历史记录"""
+        self.logger.info("显示历史记录")
+        history_entries = [entry for _, entry in self.history]
+        self.ui.show_history(history_entries)
+    
+    def _show_config(self) -> None:
+        """显示配置信息"""
+        self.logger.info("显示配置信息")
+        self.ui.show_config(self.config.to_dict())
+    
+    def _invalidate_cache(self) -> None:
+        """清除API响应缓存"""
+        self.logger.info("清除API响应缓存")
+        removed = self.cache.clear()
+        self.ui.console.print(f"[bold green]已清除 {removed} 条缓存[/bold green]")
     
     def _handle_special_commands(self, user_input: str) -> bool:
         """处理特殊命令"""
-        if user_input.lower() in ["exit", "quit", "bye"]:
-            self.logger.info("用户请求退出")
-            return True
-            
-        elif user_input.lower() == "help":
-            self.logger.info("显示帮助信息")
-            self.ui.show_help()
+        lowered = user_input.lower()
+        handler = self._special_commands.get(lowered)
+        if handler:
+            handler()
             return True
             
-        elif user_input.lower() == "clear":
-            self.logger.info("清屏")
-            self.ui.clear_screen()
-            return True
-            
-        elif user_input.lower() == "history":
-            self.logger.info("显示历史记录")
-            history_entries = [entry["user_input"] for entry in self.history]
-            self.ui.show_history(history_entries)
-            return True
-            
-        elif user_input.lower() == "config":
-            self.logger.info("显示配置信息")
-            self.ui.show_config(self.config.to_dict())
-            return True
-            
-        elif user_input.lower().startswith("edit "):
+        if lowered.startswith("edit "):
             parts = user_input.split(" ", 2)
             file_path = parts[1] if len(parts) > 1 else ""
             editor = parts[2] if len(parts) > 2 else "vim"
@@ -88,7 +240,7 @@ class Agent:
                 self.ui.show_error("请指定要编辑的文件路径")
                 return True
                 
-            self.logger.info(f"使用 {editor} 编辑文件: {file_path}")
+            self.logger.info("使用 %s 编辑文件: %s", editor, file_path)
             self.ui.console.print(f"[bold]正在使用 {editor} 编辑文件: [/bold][yellow]{file_path}[/yellow]")
             
             stdout, stderr, return_code = self.executor.execute_file_editor(file_path, editor)
@@ -104,63 +256,58 @@ class Agent:
     
     def process_user_input(self, user_input: str) -> None:
         """处理用户输入"""
-        self.logger.info(f"处理用户输入: {user_input}")
-        
-        self.history.append({
-            "user_input": user_input,
-            "timestamp": time.time()
-        })
+        confirm_dangerous = self.config.security.confirm_dangerous_commands
+        executor = self.executor
+        ui = self.ui
+        console = ui.console
+        logger = self.logger
+
+        logger.info("处理用户输入: %s", user_input)
         
-        self.ui.show_thinking()
+        self.history.append((time.time(), user_input))
         
         try:
-            system_info = self.executor.get_system_info()           
-            simple_commands = ["ls", "pwd", "cd", "cat", "echo", "mkdir", "touch", "cp", "mv", "rm", "ps", "df", "du"]
-            command_parts = user_input.split()
-            if command_parts and command_parts[0] in simple_commands:
+            command_parts = user_input.split(None, 1)
+            if command_parts and command_parts[0] in _SIMPLE_CMDS:
                 # 直接执行简单系统命令，无需调用API
-                self.logger.info(f"识别为简单系统命令: {user_input}")
-                command = user_input
-                explanation = f"执行{command_parts[0]}命令"
-                self.ui.console.print(f"[bold]理解:[/bold] {explanation}")
-                self.ui.console.print(f"[bold]要执行的命令:[/bold] [yellow]{command}[/yellow]")
-                
-                is_interactive = self.executor._is_interactive_command(command)
-                is_safe, unsafe_reason = self.executor.is_command_safe(command)
-                
-                if not is_safe and self.config.security.confirm_dangerous_commands:
-                    confirmation_message = f"此命令可能有风险: {unsafe_reason}。确认执行?"
-                    if not self.ui.confirm(confirmation_message):
-                        self.logger.info("用户取消执行危险命令")
-                        self.ui.console.print("[bold red]已取消执行[/bold red]")
-                        return
-                
-                self.ui.console.print("[bold cyan]正在执行命令，这可能需要一些时间...[/bold cyan]")
-                with self.ui.console.status("[bold green]命令执行中...[/bold green]", spinner="dots"):
-                    stdout, stderr, return_code = self.executor.execute_command(command)
-                
-                if return_code == 0:
-                    self.ui.console.print("[bold green]命令执行成功！[/bold green]")
-                    self.ui.show_result(stdout, command)
-                else:
-                    self.logger.warning(f"命令执行失败: {stderr}")
-                    self.ui.console.print("[bold red]命令执行失败[/bold red]")
-                    self.ui.show_result(stderr, command)
+                logger.info("识别为简单系统命令: %s", user_input)
+                self._execute_local_command(user_input, f"执行{command_parts[0]}命令")
+                return
+            
+            intent = self._match_local_intent(user_input)
+            if intent:
+                # 常见的只读查询直接映射为命令，无需调用API
+                command, explanation = intent
+                logger.info("识别为本地查询意图: %s -> %s", user_input, command)
+                self._execute_local_command(command, explanation)
                 return
             
+            # 提前在后台采集系统信息，与本地请求解析并行进行
+            sysinfo_future = self._pool.submit(self._cached_system_info)
+            
             parsed_command = self._parse_create_edit_request(user_input)
             if parsed_command:
-                self.logger.info(f"执行直接编辑/创建操作: {parsed_command}")
+                logger.info("执行直接编辑/创建操作: %s", parsed_command)
                 self._execute_edit_operation(parsed_command)
                 return
             
             interactive_command = self._parse_interactive_command(user_input)
             if interactive_command:
-                self.logger.info(f"直接执行交互式命令: {interactive_command}")
+                logger.info("直接执行交互式命令: %s", interactive_command)
                 self._execute_interactive_operation(interactive_command)
                 return
             
-            result = self.api.get_command_for_task(user_input, system_info)
+            # 后台检测失败时只在首次需要API时重新检测一次，之后沿用检测结果
+            if self._api_available is False and not self._api_rechecked:
+                self._api_rechecked = True
+                self._check_api_availability()
+            if self._api_available is False:
+                ui.show_error("DeepSeek API连接失败，请检查网络和API密钥")
+                return
+            
+            with ui.show_thinking():
+                system_info = sysinfo_future.result()
+                result = self.api.get_command_for_task(user_input, system_info)
             
             command = result.get("command", "")
             explanation = result.get("explanation", "")
@@ -168,28 +315,27 @@ class Agent:
             reason_if_dangerous = result.get("reason_if_dangerous", "")
             
             if not command:
-                self.logger.warning("API未返回有效命令")
-                self.ui.show_error("无法理解您的请求或无法生成对应的命令")
+                logger.warning("API未返回有效命令")
+                ui.show_error("无法理解您的请求或无法生成对应的命令")
                 return
             
             if len(command) > 1000:
-                self.logger.warning(f"生成的命令过长，可能不是有效命令: {command[:100]}...")
-                self.ui.show_error("生成的命令异常，无法执行。请尝试用更简洁的方式描述您的需求。")
+                logger.warning("生成的命令过长，可能不是有效命令: %s...", command[:100])
+                ui.show_error("生成的命令异常，无法执行。请尝试用更简洁的方式描述您的需求。")
                 return
                 
-            suspicious_starts = ["###", "##", "#", "解释:", "命令目的:", "安全性:", "是否是危险命令:"]
-            if any(command.startswith(prefix) for prefix in suspicious_starts):
-                self.logger.warning(f"生成的命令可能是解释文本，而非实际命令: {command}")
-                self.ui.show_error("生成的命令格式异常，无法执行。请重新描述您的需求。")
+            if command.startswith(_SUSPICIOUS_PREFIXES):
+                logger.warning("生成的命令可能是解释文本，而非实际命令: %s", command)
+                ui.show_error("生成的命令格式异常，无法执行。请重新描述您的需求。")
                 return
                 
-            self.logger.info(f"生成命令: {command}")
+            logger.info("生成命令: %s", command)
             
             if self._is_file_creation_command(command):
                 file_path = self._extract_file_path(command)
                 if file_path:
-                    self.ui.console.print(f"[bold]理解:[/bold] {explanation}")
-                    self.ui.console.print(f"[bold]检测到文件创建/编辑命令，将使用交互式编辑器打开文件[/bold]")
+                    console.print(f"[bold]理解:[/bold] {explanation}")
+                    console.print(f"[bold]检测到文件创建/编辑命令，将使用交互式编辑器打开文件[/bold]")
                     
                     self._ensure_directory_exists(file_path)
                     
@@ -199,199 +345,225 @@ class Agent:
             
             is_complex_command = self._is_complex_command(command)
             
-            is_safe, unsafe_reason = self.executor.is_command_safe(command)
+            is_safe, unsafe_reason = executor.is_command_safe(command)
             needs_confirmation = False
             
             if not is_safe:
                 needs_confirmation = True
-                self.logger.warning(f"命令不安全: {unsafe_reason}")
+                logger.warning("命令不安全: %s", unsafe_reason)
             elif dangerous:
                 needs_confirmation = True
                 unsafe_reason = reason_if_dangerous
-                self.logger.warning(f"命令可能有风险: {reason_if_dangerous}")
+                logger.warning("命令可能有风险: %s", reason_if_dangerous)
             
-            self.ui.console.print(f"[bold]理解:[/bold] {explanation}")
-            self.ui.console.print(f"[bold]要执行的命令:[/bold] [yellow]{command}[/yellow]")
+            ui.show_command_plan(explanation, command)
             
-            is_interactive = self.executor._is_interactive_command(command)
+            is_interactive = executor._is_interactive_command(command)
             
             if is_interactive:
-                if "vim" in command or "vi" in command or "nano" in command or "emacs" in command:
-                    self.ui.console.print("[bold cyan]这是一个文本编辑命令，将打开编辑器供您交互操作。[/bold cyan]")
-                    self.ui.console.print("[bold cyan]完成编辑后，请保存并退出编辑器继续操作。[/bold cyan]")
+                if _EDITOR_RE.search(command):
+                    console.print("[bold cyan]这是一个文本编辑命令，将打开编辑器供您交互操作。[/bold cyan]")
+                    console.print("[bold cyan]完成编辑后，请保存并退出编辑器继续操作。[/bold cyan]")
                 else:
-                    self.ui.console.print("[bold cyan]这是一个交互式命令，将直接在终端中执行...[/bold cyan]")
+                    console.print("[bold cyan]这是一个交互式命令，将直接在终端中执行...[/bold cyan]")
             
             if is_complex_command and '&&' in command and not is_interactive:
                 confirmation_message = "这是一个复杂命令，可能需要较长时间执行。是否拆分为多个命令分步执行？"
-                if self.ui.confirm(confirmation_message):
-                    self.logger.info("用户选择拆分复杂命令")
+                if ui.confirm(confirmation_message):
+                    logger.info("用户选择拆分复杂命令")
                     commands = self._split_complex_command(command)
                     self._execute_commands_sequence(commands, explanation)
                     return
             
-            if needs_confirmation and self.config.security.confirm_dangerous_commands:
+            if needs_confirmation and confirm_dangerous:
                 confirmation_message = f"此命令可能有风险: {unsafe_reason}。确认执行?"
-                if not self.ui.confirm(confirmation_message):
-                    self.logger.info("用户取消执行危险命令")
-                    self.ui.console.print("[bold red]已取消执行[/bold red]")
+                if not ui.confirm(confirmation_message):
+                    logger.info("用户取消执行危险命令")
+                    console.print("[bold red]已取消执行[/bold red]")
                     return
             
-            self.ui.console.print("[bold cyan]正在执行命令，这可能需要一些时间...[/bold cyan]")
+            console.print("[bold cyan]正在执行命令，这可能需要一些时间...[/bold cyan]")
             
             if is_interactive:
-                stdout, stderr, return_code = self.executor.execute_command(command)
+                stdout, stderr, return_code = executor.execute_command(command)
             else:
-                with self.ui.console.status("[bold green]命令执行中...[/bold green]", spinner="dots"):
-                    stdout, stderr, return_code = self.executor.execute_command(command)
+                with console.status("[bold green]命令执行中...[/bold green]", spinner="dots"):
+                    stdout, stderr, return_code = executor.execute_command(command)
             
             if is_interactive:
                 if return_code == 0:
-                    self.ui.console.print("[bold green]交互式命令执行完成[/bold green]")
+                    console.print("[bold green]交互式命令执行完成[/bold green]")
                 else:
-                    self.ui.show_error(f"交互式命令执行失败: {stderr}")
+                    ui.show_error(f"交互式命令执行失败: {stderr}")
                 return
                 
             if return_code == 0:
-                self.ui.console.print("[bold green]命令执行成功！正在分析结果...[/bold green]")
+                console.print("[bold green]命令执行成功！正在分析结果...[/bold green]")
                 analysis = self.api.analyze_command_output(command, stdout, stderr)
-                self.ui.show_result(analysis, command)
+                ui.show_result(analysis, command)
             else:
-                self.logger.warning(f"命令执行失败: {stderr}")
-                self.ui.console.print("[bold yellow]命令执行返回非零状态，正在分析问题...[/bold yellow]")
+                logger.warning("命令执行失败: %s", stderr)
+                console.print("[bold yellow]命令执行返回非零状态，正在分析问题...[/bold yellow]")
                 analysis = self.api.analyze_command_output(command, stdout, stderr)
-                self.ui.show_result(analysis, command)
+                ui.show_result(analysis, command)
                 
         except Exception as e:
-            self.logger.error(f"处理用户输入时出错: {e}", exc_info=True)
-            self.ui.show_error(f"处理请求时出错: {e}")
+            logger.error("处理用户输入时出错: %s", e, exc_info=True)
+            ui.show_error(f"处理请求时出错: {e}")
+    
+    def _match_local_intent(self, user_input: str) -> Optional[Tuple[str, str]]:
+        """将常见的只读查询直接映射为命令，返回(命令, 解释)"""
+        normalized = user_input.strip().rstrip("。.?？!！")
+        for pattern, command, explanation in _INTENT_MAP:
+            if pattern.fullmatch(normalized):
+                return command, explanation
+        return None
+    
+    def _execute_local_command(self, command: str, explanation: str) -> None:
+        """直接执行无需API生成的命令并显示输出"""
+        executor = self.executor
+        ui = self.ui
+        console = ui.console
+        
+        ui.show_command_plan(explanation, command)
+        
+        is_safe, unsafe_reason = executor.is_command_safe(command)
+        
+        if not is_safe and self.config.security.confirm_dangerous_commands:
+            confirmation_message = f"此命令可能有风险: {unsafe_reason}。确认执行?"
+            if not ui.confirm(confirmation_message):
+                self.logger.info("用户取消执行危险命令")
+                console.print("[bold red]已取消执行[/bold red]")
+                return
+        
+        console.print("[bold cyan]正在执行命令，这可能需要一些时间...[/bold cyan]")
+        with console.status("[bold green]命令执行中...[/bold green]", spinner="dots"):
+            stdout, stderr, return_code = executor.execute_command(command)
+        
+        if return_code == 0:
+            console.print("[bold green]命令执行成功！[/bold green]")
+            ui.show_result(stdout, command, plain=True)
+        else:
+            self.logger.warning("命令执行失败: %s", stderr)
+            console.print("[bold red]命令执行失败[/bold red]")
+            ui.show_result(stderr, command, plain=True)
     
     def _is_complex_command(self, command: str) -> bool:
         """判断命令是否复杂"""
-        if command.count('&&') > 2 or command.count(';') > 2:
+        separators = _COMPLEX_SEP_RE.findall(command)
+        if separators and (separators.count('&&') > 2 or separators.count(';') > 2):
             return True
             
-        pkg_managers = ['dnf', 'yum', 'apt', 'apt-get', 'pacman', 'zypper']
-        pkg_operations = ['update', 'upgrade', 'install']
-        
-        for pm in pkg_managers:
-            for op in pkg_operations:
-                if f"{pm} {op}" in command:
-                    return True
-                    
-        return False
+        return bool(_PKG_RE.search(command))
     
     def _split_complex_command(self, command: str) -> List[str]:
-        """拆分复杂命令为多个简单命令"""
-        if '&&' in command:
-            return [cmd.strip() for cmd in command.split('&&')]
-        elif ';' in command:
-            return [cmd.strip() for cmd in command.split(';')]
-        else:
-            return [command]
+        """拆分复杂命令为多个简单命令，忽略引号内的 && 和 ;"""
+        for separator in ('&&', ';'):
+            parts = _split_unquoted(command, separator)
+            if len(parts) > 1:
+                return parts
+                
+        return [command]
     
     def _execute_commands_sequence(self, commands: List[str], explanation: str) -> None:
         """按顺序执行多个命令"""
-        self.ui.console.print(f"[bold]将按以下顺序执行命令:[/bold]")
+        confirm_dangerous = self.config.security.confirm_dangerous_commands
+        executor = self.executor
+        ui = self.ui
+        console = ui.console
+
+        console.print(f"[bold]将按以下顺序执行命令:[/bold]")
         for i, cmd in enumerate(commands, 1):
-            self.ui.console.print(f"{i}. [yellow]{cmd}[/yellow]")
+            console.print(f"{i}. [yellow]{cmd}[/yellow]")
             
         total_commands = len(commands)
         results = []
         
         for i, cmd in enumerate(commands, 1):
-            self.ui.console.print(f"\n[bold]执行步骤 {i}/{total_commands}:[/bold] [yellow]{cmd}[/yellow]")
+            console.print(f"\n[bold]执行步骤 {i}/{total_commands}:[/bold] [yellow]{cmd}[/yellow]")
             
-            is_safe, unsafe_reason = self.executor.is_command_safe(cmd)
-            if not is_safe and self.config.security.confirm_dangerous_commands:
+            is_safe, unsafe_reason = executor.is_command_safe(cmd)
+            if not is_safe and confirm_dangerous:
                 confirmation_message = f"此命令可能有风险: {unsafe_reason}。确认执行?"
-                if not self.ui.confirm(confirmation_message):
-                    self.ui.console.print("[bold red]跳过此步骤[/bold red]")
+                if not ui.confirm(confirmation_message):
+                    console.print("[bold red]跳过此步骤[/bold red]")
                     results.append((cmd, "", "用户取消执行", 1))
                     continue
             
             start_time = time.time()
-            with self.ui.console.status(f"[bold green]执行步骤 {i}/{total_commands}...[/bold green]", spinner="dots"):
-                stdout, stderr, return_code = self.executor.execute_command(cmd)
+            with console.status(f"[bold green]执行步骤 {i}/{total_commands}...[/bold green]", spinner="dots"):
+                stdout, stderr, return_code = executor.execute_command(cmd)
             end_time = time.time()
             
             status = "成功" if return_code == 0 else "失败"
-            self.ui.print_command_execution_info(cmd, start_time, end_time, status)
+            ui.print_command_execution_info(cmd, start_time, end_time, status)
             
             if return_code == 0:
-                self.ui.console.print(f"[bold green]步骤 {i} 执行成功[/bold green]")
+                console.print(f"[bold green]步骤 {i} 执行成功[/bold green]")
                 if stdout:
-                    self.ui.console.print("[bold]输出:[/bold]")
+                    console.print("[bold]输出:[/bold]")
                     max_output_lines = 20
-                    output_lines = stdout.splitlines()
-                    if len(output_lines) > max_output_lines:
-                        shown_output = "\n".join(output_lines[:10] + ["...省略中间内容..."] + output_lines[-10:])
-                        self.ui.console.print(shown_output)
-                        self.ui.console.print(f"[dim](输出共 {len(output_lines)} 行，仅显示部分内容)[/dim]")
+                    output = stdout[:-1] if stdout.endswith("\n") else stdout
+                    line_count = output.count("\n") + 1
+                    if line_count > max_output_lines:
+                        head, tail = _head_and_tail(output, 10)
+                        console.print(f"{head}\n...省略中间内容...\n{tail}")
+                        console.print(f"[dim](输出共 {line_count} 行，仅显示部分内容)[/dim]")
                     else:
-                        self.ui.console.print(stdout)
+                        console.print(stdout)
             else:
-                self.ui.console.print(f"[bold red]步骤 {i} 执行失败[/bold red]")
+                console.print(f"[bold red]步骤 {i} 执行失败[/bold red]")
                 if stderr:
-                    self.ui.console.print("[bold red]错误信息:[/bold red]")
-                    self.ui.console.print(stderr)
+                    console.print("[bold red]错误信息:[/bold red]")
+                    console.print(stderr)
             
             results.append((cmd, stdout, stderr, return_code))
             
             if return_code != 0 and i < total_commands:
-                if not self.ui.confirm("上一步执行失败，是否继续执行后续步骤?"):
-                    self.ui.console.print("[bold yellow]用户中止后续步骤[/bold yellow]")
+                if not ui.confirm("上一步执行失败，是否继续执行后续步骤?"):
+                    console.print("[bold yellow]用户中止后续步骤[/bold yellow]")
                     break
         
-        self.ui.console.print("\n[bold]所有步骤执行完毕，正在分析结果...[/bold]")
-        all_stdout = "\n".join([f"命令 {i+1}: {res[0]}\n输出:\n{res[1]}\n" for i, res in enumerate(results)])
-        all_stderr = "\n".join([f"命令 {i+1} 错误:\n{res[2]}\n" if res[2] else "" for i, res in enumerate(results)])
+        console.print("\n[bold]所有步骤执行完毕，正在分析结果...[/bold]")
+        all_stdout = "\n".join(f"命令 {i}: {cmd}\n输出:\n{out}\n" for i, (cmd, out, _, _) in enumerate(results, 1))
+        all_stderr = "\n".join(f"命令 {i} 错误:\n{err}\n" if err else "" for i, (_, _, err, _) in enumerate(results, 1))
         
-        analysis = self.api.analyze_command_output("; ".join([r[0] for r in results]), all_stdout, all_stderr)
-        self.ui.show_result(analysis, explanation)
+        analysis = self.api.analyze_command_output("; ".join(r[0] for r in results), all_stdout, all_stderr)
+        ui.show_result(analysis, explanation)
     
     def _parse_interactive_command(self, user_input: str) -> Optional[str]:
         """解析常见交互式命令模式"""
-        edit_patterns = [
-            r'使用\s+(\w+)\s+编辑\s+([^\s]+)(\s+文件)?',
-            r'用\s+(\w+)\s+打开\s+([^\s]+)(\s+文件)?',
-            r'编辑\s+([^\s]+)(\s+文件)?(\s+用\s+(\w+))?'
-        ]
-        
-        for pattern in edit_patterns:
-            match = re.search(pattern, user_input)
+        for index, pattern in enumerate(_EDIT_PATTERNS):
+            match = pattern.search(user_input)
             if match:
                 groups = match.groups()
-                if pattern == edit_patterns[0] or pattern == edit_patterns[1]:
+                if index < 2:
                     editor = groups[0]
                     file_path = groups[1]
-                elif pattern == edit_patterns[2]:
+                else:
                     file_path = groups[0]
                     editor = groups[3] if groups[3] else "vim"
-                else:
-                    continue
                     
-                if editor not in ["vim", "vi", "nano", "emacs"]:
+                if editor not in _EDITORS:
                     continue
                     
                 return f"{editor} {file_path}"
         
-        for cmd in self.executor.interactive_commands:
-            if user_input.startswith(cmd + " ") or user_input == cmd:
-                return user_input
+        if user_input.partition(" ")[0] in self.executor.interactive_commands:
+            return user_input
                 
         return None
     
     def _execute_edit_operation(self, command: str) -> None:
         """执行编辑操作"""
-        parts = command.split()
+        parts = command.rsplit(None, 2)
         file_path = parts[-1]
         editor = parts[-2] if len(parts) > 1 else "vim"
         
         self.ui.console.print(f"[bold]正在使用 {editor} 编辑文件: [/bold][yellow]{file_path}[/yellow]")
         
         if file_path.endswith('.html'):
-            if 'login' in file_path.lower() or '登录' in file_path or '注册' in file_path:
+            if _LOGIN_RE.search(file_path):
                 self._get_template_suggestion(file_path, "登录注册")
         
         stdout, stderr, return_code = self.executor.execute_file_editor(file_path, editor.split('/')[-1])
@@ -400,7 +572,7 @@ class Agent:
             self.ui.console.print("[bold green]文件编辑完成[/bold green]")
             
             if file_path.endswith('.html'):
-                if "nginx" in file_path or file_path.startswith("/usr/share/nginx"):
+                if "nginx" in file_path:
                     if self.ui.confirm("是否重启Nginx服务以应用更改？"):
                         self.ui.console.print("[bold cyan]正在重启Nginx服务...[/bold cyan]")
                         restart_stdout, restart_stderr, restart_code = self.executor.execute_command("sudo systemctl restart nginx")
@@ -414,7 +586,7 @@ class Agent:
     def _get_template_suggestion(self, file_path: str, file_type: str) -> None:
         """从DeepSeek API获取模板建议"""
         try:
-            system_info = self.executor.get_system_info()
+            system_info = self._cached_system_info()
             prompt = f"需要创建{file_type}类型的文件：{file_path}，提供简洁的编辑建议。"
             response = self.api.get_template_suggestion(prompt, system_info)
             
@@ -427,12 +599,12 @@ class Agent:
         """执行交互式操作"""
         self.ui.console.print(f"[bold]执行交互式命令:[/bold] [yellow]{command}[/yellow]")
         
-        is_editor = any(editor in command.split()[0] for editor in ["vim", "vi", "nano", "emacs"])
+        is_editor = command.split(None, 1)[0].rsplit('/', 1)[-1] in _EDITORS
         if is_editor:
-            file_path = command.split()[-1]
+            file_path = command.rsplit(None, 1)[-1]
             if file_path.endswith('.html'):
                 file_type = "HTML页面"
-                if 'login' in file_path.lower() or '登录' in file_path or '注册' in file_path:
+                if _LOGIN_RE.search(file_path):
                     file_type = "登录注册页面"
                 self._get_template_suggestion(file_path, file_type)
         
@@ -442,9 +614,9 @@ class Agent:
             self.ui.console.print("[bold green]命令执行成功[/bold green]")
             
             if is_editor:
-                file_path = command.split()[-1]
+                file_path = command.rsplit(None, 1)[-1]
                 if file_path.endswith('.html'):
-                    if "nginx" in file_path or "/var/www/" in file_path or "/usr/share/nginx/" in file_path:
+                    if _NGINX_PATH_RE.search(file_path):
                         if self.ui.confirm("是否重启Nginx服务以应用更改？"):
                             self.ui.console.print("[bold cyan]正在重启Nginx服务...[/bold cyan]")
                             restart_stdout, restart_stderr, restart_code = self.executor.execute_command("sudo systemctl restart nginx")
@@ -457,52 +629,38 @@ class Agent:
             
     def _parse_create_edit_request(self, user_input: str) -> Optional[str]:
         """解析创建/编辑文件的请求"""
-        web_page_patterns = [
-            r'创建.*(?:网页|页面|HTML|html|登录页|注册页)',
-            r'制作.*(?:网页|页面|HTML|html|登录页|注册页)',
-            r'开发.*(?:网页|页面|HTML|html|登录页|注册页)',
-            r'编写.*(?:网页|页面|HTML|html|登录页|注册页)'
-        ]
-        
-        for pattern in web_page_patterns:
-            if re.search(pattern, user_input):
-                file_path_match = re.search(r'保存到\s+([^\s]+)', user_input)
-                if file_path_match:
-                    file_path = file_path_match.group(1)
-                else:
-                    file_path = "/var/www/html/index.html"
-                
-                if "nginx" in user_input.lower():
-                    file_path = "/usr/share/nginx/html/index.html"
-                
-                editor = "vim"
-                if "nano" in user_input.lower():
-                    editor = "nano"
-                elif "emacs" in user_input.lower():
-                    editor = "emacs"
-                
-                return f"sudo {editor} {file_path}"
+        if not _WEB_PAGE_RE.search(user_input):
+            return None
+            
+        file_path_match = _SAVE_TO_RE.search(user_input)
+        if file_path_match:
+            file_path = file_path_match.group(1)
+        else:
+            file_path = "/var/www/html/index.html"
         
-        return None
+        lowered = user_input.lower()
+        if "nginx" in lowered:
+            file_path = "/usr/share/nginx/html/index.html"
+        
+        editor = "vim"
+        if "nano" in lowered:
+            editor = "nano"
+        elif "emacs" in lowered:
+            editor = "emacs"
+        
+        return f"sudo {editor} {file_path}"
     
     def _is_file_creation_command(self, command: str) -> bool:
         """检查命令是否是创建文件的命令"""
-        creation_patterns = [
-            r'echo .* > .+\.html',
-            r'cat > .+\.html',
-            r'touch .+\.html',
-            r'printf .* > .+\.html'
-        ]
-        
-        return any(re.search(pattern, command) for pattern in creation_patterns)
+        return bool(_CREATION_RE.search(command))
     
     def _extract_file_path(self, command: str) -> Optional[str]:
         """从命令中提取文件路径"""
-        redirect_match = re.search(r'> ([^\s;|&]+)', command)
+        redirect_match = _REDIRECT_RE.search(command)
         if redirect_match:
             return redirect_match.group(1)
             
-        touch_match = re.search(r'touch ([^\s;|&]+)', command)
+        touch_match = _TOUCH_RE.search(command)
         if touch_match:
             return touch_match.group(1)
             
@@ -510,10 +668,14 @@ class Agent:
         
     def _ensure_directory_exists(self, file_path: str) -> None:
         """确保文件所在目录存在"""
+        dir_path = os.path.dirname(file_path)
+        if not dir_path:
+            return
+            
         try:
-            dir_path = os.path.dirname(file_path)
-            if dir_path and not os.path.exists(dir_path):
-                self.executor.execute_command(f"sudo mkdir -p {dir_path}")
+            os.makedirs(dir_path, exist_ok=True)
+        except PermissionError:
+            self.executor.execute_command(["sudo", "mkdir", "-p", dir_path])
         except Exception as e:
             self.logger.error(f"创建目录失败: {e}")
             
@@ -544,7 +706,7 @@ class Agent:
                     continue
                 
                 if self._handle_special_commands(user_input):
-                    if user_input.lower() in ["exit", "quit", "bye"]:
+                    if user_input.lower() in _EXIT_COMMANDS:
                         break
                     continue
                 
@@ -558,4 +720,5 @@ class Agent:
                 self.logger.error(f"主循环异常: {e}", exc_info=True)
                 self.ui.show_error(f"发生错误: {e}")
         
+        self._pool.shutdown(wait=False)
         self.logger.info("LinuxAgent代理已退出") 
\ No newline at end of file
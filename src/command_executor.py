@@ -10,8 +10,71 @@ import os
 import re
 import subprocess
 import shlex
+import shutil
+import socket
 import logging
-from typing import Dict, Tuple, List, Optional, Any
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Tuple, List, Optional, Any, Union
+
+
+_MEMINFO_FIELDS = (b"MemTotal", b"MemFree", b"MemAvailable")
+_MEMINFO_RE = re.compile(rb"^(" + b"|".join(_MEMINFO_FIELDS) + rb"):[ \t]*(.*?)[ \t]*$", re.MULTILINE)
+_CPU_MODEL_RE = re.compile(rb"^model name[ \t]*:[ \t]*(.*)$", re.MULTILINE)
+
+# 交互式命令，需要直接占用终端执行
+_INTERACTIVE_COMMANDS = frozenset({
+    "vim", "vi", "nano", "emacs", "less", "more", "top", "htop", "watch",
+    "mysql", "psql", "sqlite3", "telnet", "ssh", "ftp", "sftp", "python", "python3",
+    "ipython", "ipython3", "bash", "sh", "zsh", "ksh", "csh", "fish"
+})
+
+# 用户直接输入时无需调用API、可直接执行的交互式命令，范围比上面的集合小
+_DIRECT_INTERACTIVE_COMMANDS = frozenset({
+    "vim", "vi", "nano", "emacs", "less", "more", "top", "htop",
+    "mysql", "psql", "sqlite3", "python", "ipython", "bash", "sh",
+    "zsh", "ssh", "telnet", "ftp", "sftp"
+})
+
+# sudo 选项，可带一个参数，如 -u postgres
+_SUDO_OPTION = r"(?:\s+-[A-Za-z]+(?:\s+[^-\s]\S*)?)"
+
+# 交互式命令出现在命令位置(开头、管道/分隔符之后或sudo及其选项之后)、
+# 只带 -i/-s 的 sudo、带 -it 的 docker/podman/kubectl exec，或者 tail -f
+_INTERACTIVE_ANYWHERE_RE = re.compile(
+    r"(?:^|[|;&(]|\bsudo" + _SUDO_OPTION + r"*)\s*(?:\S*/)?(?:" +
+    "|".join(sorted(_INTERACTIVE_COMMANDS, key=len, reverse=True)) + r")(?=\s|$)"
+    r"|\bsudo" + _SUDO_OPTION + r"*\s+-[A-Za-z]*[is][A-Za-z]*" + _SUDO_OPTION + r"*\s*$"
+    r"|\b(?:docker|podman|kubectl)\s+exec\b(?:(?!\s--\s)[^|;&])*?\s(?:-(?:i?t|ti)|--tty)(?=\s|$)"
+    r"|\btail\s+-[fF]\b"
+)
+
+# 出现这些字符时命令需要shell来解析(管道、重定向、变量、通配符、引号等)
+_SHELL_META_RE = re.compile(r"[&|;<>$`(){}\[\]*?~#\\\"'=\n]")
+
+_OS_RELEASE_PATH = "/etc/os-release"
+_OS_RELEASE_RE = re.compile(r"""^(\w+)=(?:"([^"]*)"|'([^']*)'|(.*))$""", re.MULTILINE)
+
+# 只能由shell执行的内置命令和关键字
+_SHELL_BUILTINS = frozenset({
+    "cd", "export", "source", ".", "alias", "unalias", "unset", "set", "ulimit",
+    "umask", "eval", "exec", "exit", "history", "read", "wait", "jobs", "fg", "bg",
+    "pushd", "popd", "dirs", "declare", "local", "let", "shopt", "trap", "type", "hash",
+    "command", "getopts", "return", "shift", "times", "readonly", "break", "continue",
+    "!", "time", "if", "for", "while", "until", "case", "select", "function", "{", "[["
+})
+
+
+@functools.lru_cache(maxsize=4)
+def _parse_os_release(mtime_ns: int) -> Dict[str, str]:
+    """解析 /etc/os-release，按文件修改时间缓存结果"""
+    with open(_OS_RELEASE_PATH, "r") as f:
+        data = f.read()
+    return {
+        key: double_quoted or single_quoted or bare.strip()
+        for key, double_quoted, single_quoted, bare in _OS_RELEASE_RE.findall(data)
+    }
 
 
 class CommandExecutor:
@@ -23,24 +86,47 @@ class CommandExecutor:
         self.blocked_commands = security_config.blocked_commands
         self.confirm_patterns = security_config.confirm_patterns
         
+        # 禁止命令和需确认模式在初始化时预编译，检查时只需一次集合查找和一次正则扫描
+        self._blocked_set = frozenset(self.blocked_commands)
+        self._blocked_prefix_re = re.compile(
+            r"(?:" + "|".join(map(re.escape, self.blocked_commands)) + r") "
+        ) if self.blocked_commands else None
+        self._confirm_re = re.compile(
+            "|".join(map(re.escape, self.confirm_patterns))
+        ) if self.confirm_patterns else None
+        
         self.logger = logger or logging.getLogger("command_executor")
         
-        self.interactive_commands = [
-            'vim', 'vi', 'nano', 'emacs', 'less', 'more', 'top', 'htop',
-            'mysql', 'psql', 'sqlite3', 'python', 'ipython', 'bash', 'sh',
-            'zsh', 'ssh', 'telnet', 'ftp', 'sftp'
-        ]
+        # 操作系统、内核、主机名、CPU等信息在运行期间不会变化，首次采集后缓存
+        self._static_info: Optional[Dict[str, Any]] = None
+        
+        # 读取 /proc 文件复用的缓冲区，文件更大时自动扩容；系统信息可能在后台线程中采集，需加锁
+        self._procbuf = bytearray(8192)
+        self._procbuf_lock = threading.Lock()
+        
+        self.interactive_commands = _DIRECT_INTERACTIVE_COMMANDS
     
     def is_command_safe(self, command: str) -> Tuple[bool, str]:
         """检查命令是否安全"""
-        for blocked in self.blocked_commands:
-            if command.strip() == blocked or command.strip().startswith(f"{blocked} "):
-                reason = f"命令 '{blocked}' 已被禁止执行"
-                self.logger.warning(f"发现禁止命令: {command}")
-                return False, reason
+        stripped = command.strip()
+        
+        blocked = None
+        if stripped in self._blocked_set:
+            blocked = stripped
+        elif self._blocked_prefix_re is not None:
+            blocked_match = self._blocked_prefix_re.match(stripped)
+            if blocked_match:
+                blocked = blocked_match.group(0)[:-1]
         
-        for pattern in self.confirm_patterns:
-            if pattern in command:
+        if blocked is not None:
+            reason = f"命令 '{blocked}' 已被禁止执行"
+            self.logger.warning(f"发现禁止命令: {command}")
+            return False, reason
+        
+        if self._confirm_re is not None:
+            confirm_match = self._confirm_re.search(command)
+            if confirm_match:
+                pattern = confirm_match.group(0)
                 reason = f"命令包含潜在危险操作 '{pattern}'"
                 self.logger.info(f"发现需要确认的命令模式: {pattern} in {command}")
                 return False, reason
@@ -52,60 +138,83 @@ class CommandExecutor:
         info = {}
         
         try:
-            if os.path.exists("/etc/os-release"):
-                with open("/etc/os-release", "r") as f:
-                    for line in f:
-                        if "=" in line:
-                            key, value = line.strip().split("=", 1)
-                            value = value.strip('"')
-                            info[key] = value
-            
-            kernel = subprocess.check_output(["uname", "-r"], text=True).strip()
-            info["KERNEL"] = kernel
-            
-            hostname = subprocess.check_output(["hostname"], text=True).strip()
-            info["HOSTNAME"] = hostname
-            
-            cpu_info = {}
-            if os.path.exists("/proc/cpuinfo"):
-                with open("/proc/cpuinfo", "r") as f:
-                    for line in f:
-                        if ":" in line:
-                            key, value = line.strip().split(":", 1)
-                            key = key.strip()
-                            value = value.strip()
-                            if key == "model name":
-                                cpu_info["MODEL"] = value
-                                break
-            
-            try:
-                cpu_cores = subprocess.check_output(
-                    "nproc", text=True, stderr=subprocess.PIPE
-                ).strip()
-                cpu_info["CORES"] = cpu_cores
-            except:
-                pass
+            with self._procbuf_lock:
+                if self._static_info is None:
+                    self._static_info = self._collect_static_info()
+                info.update(self._static_info)
                 
-            info["CPU"] = cpu_info
-            
-            mem_info = {}
-            if os.path.exists("/proc/meminfo"):
-                with open("/proc/meminfo", "r") as f:
-                    for line in f:
-                        if ":" in line:
-                            key, value = line.strip().split(":", 1)
-                            key = key.strip()
-                            value = value.strip()
-                            if key in ["MemTotal", "MemFree", "MemAvailable"]:
-                                mem_info[key] = value
-            
-            info["MEMORY"] = mem_info
+                info["MEMORY"] = self._collect_mem_info()
             
         except Exception as e:
             self.logger.error(f"获取系统信息失败: {e}")
         
         return info
     
+    def _collect_static_info(self) -> Dict[str, Any]:
+        """采集开机后基本不会变化的系统信息"""
+        info = {}
+        
+        try:
+            info.update(_parse_os_release(os.stat(_OS_RELEASE_PATH).st_mtime_ns))
+        except FileNotFoundError:
+            pass
+        
+        info["KERNEL"] = os.uname().release
+        info["HOSTNAME"] = socket.gethostname()
+        
+        cpu_info = {}
+        try:
+            with self._read_proc("/proc/cpuinfo") as data:
+                model_match = _CPU_MODEL_RE.search(data)
+                if model_match:
+                    cpu_info["MODEL"] = model_match.group(1).strip().decode("utf-8", "replace")
+        except FileNotFoundError:
+            pass
+        
+        # 与 nproc 一致，统计当前进程可用的CPU数
+        if hasattr(os, "sched_getaffinity"):
+            cpu_info["CORES"] = str(len(os.sched_getaffinity(0)))
+        elif os.cpu_count():
+            cpu_info["CORES"] = str(os.cpu_count())
+            
+        info["CPU"] = cpu_info
+        
+        return info
+    
+    def _collect_mem_info(self) -> Dict[str, str]:
+        """采集内存信息"""
+        mem_info = {}
+        # 直接打开，文件不存在时再处理，省去每次调用前额外的 stat 系统调用
+        try:
+            with self._read_proc("/proc/meminfo") as data:
+                for match in _MEMINFO_RE.finditer(data):
+                    mem_info[match.group(1).decode()] = match.group(2).decode()
+                    # 所需字段都在文件开头，取齐后即可停止扫描
+                    if len(mem_info) == len(_MEMINFO_FIELDS):
+                        break
+        except FileNotFoundError:
+            pass
+        
+        return mem_info
+    
+    def _read_proc(self, path: str) -> memoryview:
+        """将 /proc 文件读入复用的缓冲区，返回有效内容的视图，调用方用完需释放视图"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = 0
+            while True:
+                if size == len(self._procbuf):
+                    self._procbuf.extend(bytes(len(self._procbuf)))
+                with memoryview(self._procbuf) as view:
+                    count = os.readv(fd, [view[size:]])
+                if count == 0:
+                    break
+                size += count
+        finally:
+            os.close(fd)
+        
+        return memoryview(self._procbuf)[:size]
+    
     def _get_command_timeout(self, command: str) -> int:
         """根据命令类型获取适当的超时时间"""
         pkg_managers = ['dnf', 'yum', 'apt', 'apt-get', 'pacman', 'zypper']
@@ -121,23 +230,34 @@ class CommandExecutor:
             
         return 120  # 2分钟
     
-    def execute_command(self, command: str, timeout: Optional[int] = None) -> Tuple[str, str, int]:
-        """执行命令，并返回执行结果"""
-        self.logger.info(f"执行命令: {command}")
-        
-        if self._is_interactive_command(command):
-            self.logger.info("检测到交互式命令，使用交互式执行方式")
-            return self._execute_interactive_command(command)
+    def execute_command(self, command: Union[str, List[str]], timeout: Optional[int] = None) -> Tuple[str, str, int]:
+        """执行命令，并返回执行结果。command为参数列表时不经过shell直接执行"""
+        if isinstance(command, str):
+            command_text = command
+            self.logger.info(f"执行命令: {command_text}")
+            
+            if self._is_interactive_command(command):
+                self.logger.info("检测到交互式命令，使用交互式执行方式")
+                return self._execute_interactive_command(command)
+            
+            # 不含shell语法的简单命令直接执行，省去额外启动 /bin/sh 的开销
+            use_shell = self._needs_shell(command)
+            args = command if use_shell else command.split()
+        else:
+            args = list(command)
+            command_text = shlex.join(args)
+            use_shell = False
+            self.logger.info(f"执行命令: {command_text}")
         
         if timeout is None:
-            timeout = self._get_command_timeout(command)
+            timeout = self._get_command_timeout(command_text)
             
         try:
             process = subprocess.Popen(
-                command,
+                args,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                shell=True,
+                shell=use_shell,
                 text=True,
                 encoding='utf-8',
                 errors='replace'
@@ -157,23 +277,31 @@ class CommandExecutor:
             self.logger.error(f"命令执行超时 (超过 {timeout}秒)")
             return "", f"命令执行超时 (超过 {timeout}秒)", 1
             
+        except FileNotFoundError:
+            # 与shell的行为保持一致，命令不存在时返回127
+            program = command_text if use_shell else args[0]
+            self.logger.warning(f"命令不存在: {program}")
+            return "", f"{program}: command not found", 127
+            
         except Exception as e:
             self.logger.error(f"命令执行失败: {e}", exc_info=True)
             return "", str(e), 1
     
+    def _needs_shell(self, command: str) -> bool:
+        """检查命令是否需要交给shell解析"""
+        first_word = command.split(None, 1)[0] if command.strip() else ""
+        if not first_word or first_word in _SHELL_BUILTINS or _SHELL_META_RE.search(command):
+            return True
+        # 在PATH中找不到的程序交给shell处理，未列出的内置命令也能正常执行，错误信息与shell一致
+        return shutil.which(first_word) is None
+    
     def _is_interactive_command(self, command: str) -> bool:
         """检查命令是否是交互式命令"""
-        interactive_commands = [
-            "vim", "vi", "nano", "emacs", "less", "more", "top", "htop",
-            "watch", "tail -f", "mysql", "psql", "telnet", "ssh", "python",
-            "ipython", "bash", "sh", "zsh", "ksh", "csh", "fish"
-        ]
-        
-        first_word = command.split()[0] if command else ""
-        if first_word in interactive_commands:
+        first_word = command.split(None, 1)[0] if command else ""
+        if first_word in _INTERACTIVE_COMMANDS:
             return True
             
-        return any(ic in command for ic in interactive_commands)
+        return bool(_INTERACTIVE_ANYWHERE_RE.search(command))
         
     def _execute_interactive_command(self, command: str) -> Tuple[str, str, int]:
         """执行交互式命令"""
@@ -207,13 +335,17 @@ class CommandExecutor:
                 
                 print(f"{'='*60}\n")
             
-            return_code = os.system(command)
-            if os.name == 'posix':
-                actual_return_code = return_code >> 8
+            # 不捕获输出，子进程直接继承当前终端
+            if self._needs_shell(command):
+                result = subprocess.run(command, shell=True, check=False)
             else:
-                actual_return_code = return_code
+                args = command.split()
+                try:
+                    result = subprocess.run(args, check=False)
+                except FileNotFoundError:
+                    return "", f"{args[0]}: command not found", 127
                 
-            return "", "", actual_return_code
+            return "", "", result.returncode
             
         except Exception as e:
             self.logger.error(f"执行交互式命令失败: {e}", exc_info=True)
@@ -237,8 +369,7 @@ class CommandExecutor:
                     pass
             except Exception as e:
                 if "Permission denied" in str(e):
-                    cmd = f"sudo touch {file_path}"
-                    os.system(cmd)
+                    subprocess.run(["sudo", "touch", file_path], check=False)
                 else:
                     self.logger.error(f"创建文件失败: {str(e)}")
                     return "", f"创建文件失败: {str(e)}", 1
@@ -250,8 +381,15 @@ class CommandExecutor:
             
         return self._execute_interactive_command(command)
     
-    def execute_multiple_commands(self, commands: List[str]) -> List[tuple]:
-        """依次执行多个命令"""
+    def execute_multiple_commands(self, commands: List[str], parallel: bool = False,
+                                  max_workers: int = 4) -> List[tuple]:
+        """执行多个命令。默认依次执行并在失败时停止；parallel为True时并发执行互不依赖的命令"""
+        if parallel and not any(self._is_interactive_command(cmd) for cmd in commands):
+            # 命令执行主要是等待子进程，线程足以并发，结果按原顺序返回
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                outputs = list(pool.map(self.execute_command, commands))
+            return [(cmd, *output) for cmd, output in zip(commands, outputs)]
+        
         results = []
         
         for cmd in commands:
@@ -7,7 +7,6 @@
 """
 
 import os
-import yaml
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 
@@ -64,8 +63,14 @@ class Config:
         if not os.path.exists(self.config_file):
             raise FileNotFoundError(f"配置文件不存在: {self.config_file}")
         
+        # 只在真正加载配置时才导入yaml，--help/--version 等不需要承担导入开销
+        import yaml
+        
+        # 安装了libyaml时使用C实现的加载器，解析更快
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+        
         with open(self.config_file, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+            return yaml.load(f, Loader=loader)
     
     def _parse_api_config(self) -> ApiConfig:
         """解析API配置"""
@@ -9,15 +9,62 @@ DeepSeek API客户端
 import os
 import json
 import logging
-import requests
 import re
-from typing import Dict, Any, List, Optional, Union
+import threading
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List, Optional, Union
+
+from .response_cache import ResponseCache
+
+# orjson 可选，解析API回复更快；未安装时退回标准库 json。
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，异常处理无需区分
+try:
+    import orjson
+    
+    def _json_loads(data: Union[str, bytes]) -> Any:
+        """解析JSON，orjson不接受的内容(NaN/Infinity、单独的代理字符)交给标准库 json 再试一次"""
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(data)
+except ImportError:
+    _json_loads = json.loads
+
+# requests 及其依赖导入较慢，推迟到第一次发起请求时再导入
+if TYPE_CHECKING:
+    import requests
+
+
+# 解析文本回复时使用的正则表达式，在模块加载时编译一次
+_DANGEROUS_RE = re.compile(r"(?:危险|是否是危险命令|Dangerous)[：:]\s*(.*?)(?:\n|$)")
+_REASON_RE = re.compile(r"(?:原因|理由|Reason)[：:]\s*(.*?)(?:\n|$)")
+_EXPL_RE = re.compile(r"(?:命令目的|命令说明|目的|说明)[:：]\s*(.*?)(?:\n\n|\n#|\Z)", re.DOTALL)
+_SEG_RE = re.compile(r"```|命令:|Command:")
+
+# 清理命令中的Markdown标记，str.translate 一次遍历即可删除全部字符
+_MD_STRIP_TABLE = str.maketrans("", "", "`_*")
+_MD_CMD_STRIP_TABLE = str.maketrans("", "", "`*")
+
+# 逐行解析文本回复时用到的行首标记
+_FENCE_OPENERS = frozenset({"```", "```bash", "```shell"})
+_COMMENT_PREFIXES = ("#", "//", "/*")
+_COMMAND_LABELS = ("命令:", "Command:", "要执行的命令:")
+_EXPLANATION_LABELS = ("解释:", "说明:", "Explanation:")
+_DANGER_LABELS = ("危险:", "Dangerous:")
+
+# "危险:" 字段首个词对应的判断结果
+_DANGER_TOKEN_RE = re.compile(r"[^\s,，。.;；:：!！]+")
+_DANGER_TRUE = frozenset({"是", "是的", "yes", "true", "危险"})
+_DANGER_FALSE = frozenset({"否", "不是", "no", "false", "安全"})
+
+# 识别回复中命令行的常见命令名，前缀附带边界字符以便直接交给 str.startswith
+_CMD_NAMES = frozenset({"ls", "cd", "grep", "echo", "cat", "sudo", "apt", "yum", "dnf", "find", "ps", "mkdir"})
+_CMD_PREFIXES = tuple(name + sep for name in _CMD_NAMES for sep in (" ", "-"))
 
 
 class DeepSeekAPI:
     """DeepSeek API客户端"""
     
-    def __init__(self, api_config, logger=None):
+    def __init__(self, api_config, logger=None, cache: Optional[ResponseCache] = None):
         """初始化API客户端"""
         self.api_key = api_config.api_key or os.environ.get("DEEPSEEK_API_KEY", "")
         self.base_url = api_config.base_url
@@ -25,6 +72,15 @@ class DeepSeekAPI:
         self.timeout = api_config.timeout
         
         self.logger = logger or logging.getLogger("deepseek_api")
+        self.cache = cache
+        
+        # 会话在第一次请求时创建，之后复用同一个会话保持长连接
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+        
+        # 格式化后的系统信息文本，调用方在有效期内传入同一个字典时直接复用
+        self._cached_sysinfo: Optional[Dict[str, Any]] = None
+        self._cached_sysinfo_text: Optional[str] = None
         
         # 系统提示模板
         self.system_prompt_template = {
@@ -63,12 +119,10 @@ class DeepSeekAPI:
             return False
         
         try:
-            headers = self._build_headers()
             url = f"{self.base_url}/models"
             
-            response = requests.get(
+            response = self._get_session().get(
                 url,
-                headers=headers,
                 timeout=self.timeout
             )
             
@@ -82,6 +136,28 @@ class DeepSeekAPI:
             self.logger.error(f"API连接测试异常: {e}")
             return False
     
+    def _get_session(self) -> "requests.Session":
+        """获取HTTP会话，首次调用时导入requests并创建会话"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+                    
+                    # 复用同一个会话，保持与API服务器的长连接，避免每次请求重新握手
+                    session = requests.Session()
+                    adapter = HTTPAdapter(
+                        pool_connections=4,
+                        pool_maxsize=8,
+                        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+                    )
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update(self._build_headers())
+                    self._session = session
+        return self._session
+    
     def _build_headers(self) -> Dict[str, str]:
         """构建请求头"""
         return {
@@ -89,10 +165,10 @@ class DeepSeekAPI:
             "Authorization": f"Bearer {self.api_key}"
         }
     
-    def _handle_api_error(self, response: requests.Response) -> Dict[str, Any]:
+    def _handle_api_error(self, response: "requests.Response") -> Dict[str, Any]:
         """处理API错误响应"""
         try:
-            error_data = response.json()
+            error_data = _json_loads(response.content)
             error_msg = error_data.get("error", {}).get("message", f"API错误: {response.status_code}")
             self.logger.error(f"API错误: {error_msg}")
             return {"error": error_msg}
@@ -109,10 +185,11 @@ class DeepSeekAPI:
                            temperature: float = 0.7,
                            max_tokens: int = 4000) -> Dict[str, Any]:
         """调用DeepSeek API"""
+        import requests
+        
         self.logger.info(f"调用DeepSeek API: {self.model}")
         
         url = f"{self.base_url}/chat/completions"
-        headers = self._build_headers()
         
         data = {
             "model": self.model,
@@ -122,15 +199,14 @@ class DeepSeekAPI:
         }
         
         try:
-            response = requests.post(
+            response = self._get_session().post(
                 url,
-                headers=headers,
                 json=data,
                 timeout=self.timeout
             )
             
             if response.status_code == 200:
-                return response.json()
+                return _json_loads(response.content)
             else:
                 return self._handle_api_error(response)
         except requests.RequestException as e:
@@ -142,9 +218,52 @@ class DeepSeekAPI:
             self.logger.error(error_msg)
             return {"error": error_msg}
     
+    def _call_deepseek_api_stream(self, messages: List[Dict[str, str]], 
+                                  temperature: float = 0.7,
+                                  max_tokens: int = 4000) -> Iterator[str]:
+        """以流式方式调用DeepSeek API，逐段返回回复内容，出错时抛出异常"""
+        self.logger.info(f"流式调用DeepSeek API: {self.model}")
+        
+        url = f"{self.base_url}/chat/completions"
+        
+        data = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        
+        with self._get_session().post(url, json=data, stream=True, timeout=self.timeout) as response:
+            if response.status_code != 200:
+                raise RuntimeError(self._handle_api_error(response)["error"])
+            
+            # 服务端按SSE格式推送，每个 "data:" 行是一段增量回复
+            for line in response.iter_lines():
+                if not line.startswith(b"data:"):
+                    continue
+                
+                payload = line[5:].strip()
+                if payload == b"[DONE]":
+                    break
+                
+                choices = _json_loads(payload).get("choices")
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+    
+    def _format_system_info(self, system_info: Dict[str, Any]) -> str:
+        """将系统信息格式化为提示文本，同一个字典只格式化一次"""
+        # 保留字典本身的引用而不是只记 id()，避免对象被回收后 id 被复用
+        if system_info is not self._cached_sysinfo:
+            self._cached_sysinfo_text = "\n".join(f"{k}: {v}" for k, v in system_info.items())
+            self._cached_sysinfo = system_info
+        return self._cached_sysinfo_text
+    
     def _build_command_prompt(self, task: str, system_info: Dict[str, Any]) -> str:
         """构建命令生成的提示"""
-        system_info_formatted = "\n".join([f"{k}: {v}" for k, v in system_info.items()])
+        system_info_formatted = self._format_system_info(system_info)
         
         return (
             f"任务: {task}\n\n"
@@ -171,24 +290,41 @@ class DeepSeekAPI:
             {"role": "user", "content": user_message}
         ]
         
-        response = self._call_deepseek_api(messages, temperature, max_tokens)
+        try:
+            response_message = "".join(self._call_deepseek_api_stream(messages, temperature, max_tokens))
+        except Exception as e:
+            self.logger.error(f"聊天API调用失败: {e}")
+            return {"response": f"抱歉，无法获取回复: {e}"}
         
-        if "error" in response:
-            self.logger.error(f"聊天API调用失败: {response['error']}")
-            return {"response": f"抱歉，无法获取回复: {response['error']}"}
+        self.logger.info("成功获取API回复")
+        return {"response": response_message}
+    
+    def chat_stream(self, user_message: str, temperature: float = 0.7, 
+                    max_tokens: int = 3000) -> Iterator[str]:
+        """与DeepSeek API聊天，回复内容边生成边返回"""
+        messages = [
+            {"role": "user", "content": user_message}
+        ]
         
-        try:
-            response_message = response['choices'][0]['message']['content']
-            self.logger.info("成功获取API回复")
-            return {"response": response_message}
-        except KeyError as e:
-            self.logger.error(f"解析API回复失败: {e}")
-            return {"response": "抱歉，解析回复时出错"}
+        return self._call_deepseek_api_stream(messages, temperature, max_tokens)
     
     def get_command_for_task(self, task: str, system_info: Dict[str, Any]) -> Dict[str, Any]:
         """获取执行任务的命令"""
         self.logger.info(f"获取命令，任务: {task}")
         
+        cache_key = None
+        if self.cache is not None:
+            # 内存占用每次都会变化，不参与缓存键的计算
+            stable_info = {k: v for k, v in system_info.items() if k != "MEMORY"}
+            cache_key = ResponseCache.make_key(
+                "command", self.model, task,
+                json.dumps(stable_info, sort_keys=True, ensure_ascii=False)
+            )
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.info("命令缓存命中")
+                return cached
+        
         prompt = self._build_command_prompt(task, system_info)
         messages = [
             {"role": "user", "content": prompt}
@@ -204,97 +340,131 @@ class DeepSeekAPI:
             content = response['choices'][0]['message']['content']
             
             try:
-                response_json = json.loads(content)
-                return response_json
+                result = _json_loads(content)
             except json.JSONDecodeError:
-                return self._parse_text_response(content)
+                result = self._parse_text_response(content)
                 
         except KeyError as e:
             self.logger.error(f"解析API回复失败: {e}")
             return {}
+        
+        if cache_key is not None and isinstance(result, dict) and result.get("command"):
+            self.cache.set(cache_key, result)
+            
+        return result
     
     def _parse_text_response(self, text: str) -> Dict[str, Any]:
         """解析文本格式的回复为结构化数据"""
         result = {}
+        lines = text.split("\n")
         
-        command_pattern = r"```(?:bash|shell)?\s*\n(.*?)\n```"
-        command_match = re.search(command_pattern, text, re.DOTALL)
-        if command_match:
-            command_lines = command_match.group(1).strip().split('\n')
-            for line in command_lines:
-                line = line.strip()
-                if line and not line.startswith('#') and not line.startswith('//') and not line.startswith('/*'):
-                    result["command"] = line
-                    break
-            if "command" not in result:
-                result["command"] = command_lines[0].strip()
-        else:
-            lines = text.split("\n")
-            for line in lines:
-                line = line.strip()
-                if line.startswith("命令:") or line.startswith("Command:") or line.startswith("要执行的命令:"):
-                    cmd_part = line.split(":", 1)[1].strip()
-                    cmd_part = re.sub(r'\*\*|\*|`', '', cmd_part)
-                    result["command"] = cmd_part
-                    break
-            
-            if "command" not in result:
-                for line in lines:
-                    line = line.strip()
-                    if line and not line.startswith('###') and not line.startswith('##') and not line.startswith('#') and not '解释' in line:
-                        command_prefixes = ["ls", "cd", "grep", "echo", "cat", "sudo", "apt", "yum", "dnf", "find", "ps", "mkdir"]
-                        for prefix in command_prefixes:
-                            if line.startswith(prefix) and (len(line) == len(prefix) or line[len(prefix)] in [' ', '-']):
-                                result["command"] = line
-                                break
-                        if "command" in result:
-                            break
-                
-
-                if "command" not in result and lines:
-                    first_line = lines[0].strip()
-                    if first_line.startswith("$") or first_line.startswith("#"):
-                        result["command"] = first_line[1:].strip()
-        
+        # 逐行扫描一遍，同时收集各种来源的命令、解释和危险标记，最后按优先级取用
+        in_fence = False
+        fence_done = False
+        fence_first = None
+        fence_command = None
+        labeled_command = None
+        guessed_command = None
         explanation_found = False
         explanation_lines = []
+        danger_text = None
+        reason_text = None
+        # 标签后为空时(如 "危险:" 单独一行)，取下一个非空行作为其值
+        danger_pending = False
+        reason_pending = False
         
-        for line in text.split("\n"):
+        for line in lines:
             line = line.strip()
-            if line.startswith("解释:") or line.startswith("说明:") or line.startswith("Explanation:"):
+            
+            if in_fence:
+                if line.startswith("```"):
+                    # 只采用第一个有内容且完整闭合的代码块，空代码块忽略
+                    in_fence = False
+                    if fence_first is not None:
+                        fence_done = True
+                        if fence_command is None:
+                            fence_command = fence_first
+                elif line:
+                    if fence_first is None:
+                        fence_first = line
+                    if fence_command is None and not line.startswith(_COMMENT_PREFIXES):
+                        fence_command = line
+            elif not fence_done and line in _FENCE_OPENERS:
+                in_fence = True
+            
+            if labeled_command is None and line.startswith(_COMMAND_LABELS):
+                labeled_command = line.split(":", 1)[1].strip().translate(_MD_CMD_STRIP_TABLE)
+            elif (guessed_command is None and line and not line.startswith('#') and '解释' not in line
+                    and (line.startswith(_CMD_PREFIXES) or line in _CMD_NAMES)):
+                guessed_command = line
+            
+            if line.startswith(_EXPLANATION_LABELS):
                 explanation_found = True
                 explanation_lines.append(line.split(":", 1)[1].strip())
-            elif explanation_found and line and not line.startswith("危险:") and not line.startswith("Dangerous:"):
+            elif explanation_found and line and not line.startswith(_DANGER_LABELS):
                 explanation_lines.append(line)
+            
+            if danger_pending and line:
+                danger_text = line
+                danger_pending = False
+            elif danger_text is None and not danger_pending and ("危险" in line or "Dangerous" in line):
+                danger_match = _DANGEROUS_RE.search(line)
+                if danger_match:
+                    danger_text = danger_match.group(1).strip() or None
+                    danger_pending = danger_text is None
+            if reason_pending and line:
+                reason_text = line
+                reason_pending = False
+            elif reason_text is None and not reason_pending and ("原因" in line or "理由" in line or "Reason" in line):
+                reason_match = _REASON_RE.search(line)
+                if reason_match:
+                    reason_text = reason_match.group(1).strip() or None
+                    reason_pending = reason_text is None
+        
+        if fence_done:
+            result["command"] = fence_command
+        elif labeled_command is not None:
+            result["command"] = labeled_command
+        elif guessed_command is not None:
+            result["command"] = guessed_command
+        else:
+            first_line = lines[0].strip()
+            if first_line.startswith("$") or first_line.startswith("#"):
+                result["command"] = first_line[1:].strip()
         
         if explanation_lines:
             result["explanation"] = " ".join(explanation_lines)
         else:
-            explanation_match = re.search(r"(?:命令目的|命令说明|目的|说明)[:：]\s*(.*?)(?:\n\n|\n#|\Z)", text, re.DOTALL)
+            explanation_match = _EXPL_RE.search(text)
             if explanation_match:
                 result["explanation"] = explanation_match.group(1).strip()
             else:
-                segments = re.split(r"```|命令:|Command:", text)
+                segments = _SEG_RE.split(text)
                 if len(segments) > 1:
                     explanation = segments[1].strip()
                     if not explanation and len(segments) > 2:
                         explanation = segments[2].strip()
                     result["explanation"] = explanation
         
-        dangerous_match = re.search(r"(?:危险|是否是危险命令)[：:]\s*(.*?)(?:\n|$)", text) or re.search(r"Dangerous[：:]\s*(.*?)(?:\n|$)", text)
-        if dangerous_match:
-            danger_text = dangerous_match.group(1).lower().strip()
-            result["dangerous"] = ("是" in danger_text or "yes" in danger_text or "true" in danger_text) and not ("否" in danger_text or "no" in danger_text or "false" in danger_text)
+        if danger_text is not None:
+            danger_text = danger_text.lower().strip()
+            token_match = _DANGER_TOKEN_RE.match(danger_text)
+            token = token_match.group(0) if token_match else ""
+            if token in _DANGER_TRUE:
+                result["dangerous"] = True
+            elif token in _DANGER_FALSE:
+                result["dangerous"] = False
+            else:
+                # 首个词无法判断时，退回到按关键字整体判断
+                result["dangerous"] = ("是" in danger_text or "yes" in danger_text or "true" in danger_text) and not ("否" in danger_text or "no" in danger_text or "false" in danger_text)
             
-            reason_match = re.search(r"(?:原因|理由)[：:]\s*(.*?)(?:\n|$)", text) or re.search(r"Reason[：:]\s*(.*?)(?:\n|$)", text)
-            if reason_match:
-                result["reason_if_dangerous"] = reason_match.group(1).strip()
+            if reason_text is not None:
+                result["reason_if_dangerous"] = reason_text
         
         if "command" not in result or not result["command"]:
             self.logger.warning(f"无法从回复中提取命令: {text}")
-            text_lines = text.split('\n')
-            if text_lines and len(text_lines[0]) < 100:
-                result["command"] = text_lines[0].strip()
+            if len(lines[0]) < 100:
+                result["command"] = lines[0].strip()
             else:
                 result["command"] = ""
             
@@ -309,8 +479,8 @@ class DeepSeekAPI:
             
         if "command" in result:
             command = result["command"]
-            command = re.sub(r'`|_|\*\*|\*', '', command)
-            if (command.startswith('"') and command.endswith('"')) or (command.startswith("'") and command.endswith("'")):
+            command = command.translate(_MD_STRIP_TABLE)
+            if len(command) >= 2 and command[0] == command[-1] and command[0] in "'\"":
                 command = command[1:-1]
             result["command"] = command.strip()
             
@@ -321,29 +491,38 @@ class DeepSeekAPI:
         """分析命令执行结果"""
         self.logger.info(f"分析命令执行结果: {command}")
         
+        cache_key = None
+        if self.cache is not None:
+            cache_key = ResponseCache.make_key("analyze", self.model, command, stdout, stderr)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.logger.info("分析结果缓存命中")
+                return cached
+        
         prompt = self._build_analysis_prompt(command, stdout, stderr)
         messages = [
             {"role": "user", "content": prompt}
         ]
         
-        response = self._call_deepseek_api(messages)
-        
-        if "error" in response:
-            self.logger.error(f"分析API调用失败: {response['error']}")
-            return f"无法分析执行结果: {response['error']}"
-        
         try:
-            content = response['choices'][0]['message']['content']
-            return content
-        except KeyError as e:
-            self.logger.error(f"解析API回复失败: {e}")
+            content = "".join(self._call_deepseek_api_stream(messages))
+        except Exception as e:
+            self.logger.error(f"分析API调用失败: {e}")
+            return f"无法分析执行结果: {e}"
+        
+        if not content:
             return "抱歉，无法分析命令执行结果"
+        
+        if cache_key is not None:
+            self.cache.set(cache_key, content)
+            
+        return content
     
     def get_template_suggestion(self, prompt: str, system_info: Dict[str, Any]) -> Dict[str, Any]:
         """获取模板建议"""
         self.logger.info(f"获取模板建议: {prompt}")
         
-        system_info_formatted = "\n".join([f"{k}: {v}" for k, v in system_info.items()])
+        system_info_formatted = self._format_system_info(system_info)
         full_prompt = (
             f"{prompt}\n\n"
             f"系统信息:\n"
@@ -391,10 +570,9 @@ class DeepSeekAPI:
                 {"role": "user", "content": user_message}
             ]
             
-            response = self._call_deepseek_api(messages)
-            
-            if "choices" in response and len(response["choices"]) > 0:
-                return response["choices"][0]["message"]["content"]
+            content = "".join(self._call_deepseek_api_stream(messages))
+            if content:
+                return content
             
             return f"无法获取 {command} 的帮助信息"
             
@@ -11,6 +11,15 @@ import logging
 from logging.handlers import RotatingFileHandler
 
 
+_FORMATTER = logging.Formatter(
+    "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+# 上一次配置日志时使用的参数，参数相同时无需重建处理器
+_current_settings = None
+
+
 def setup_logger(
     level=logging.INFO,
     log_file="~/.linuxagent.log",
@@ -18,19 +27,22 @@ def setup_logger(
     backup_count=5
 ):
     """设置应用日志"""
+    global _current_settings
+    
     logger = logging.getLogger("linuxagent")
+    
+    settings = (level, log_file, max_size_mb, backup_count)
+    if settings == _current_settings:
+        return logger
+    
     logger.setLevel(level)
     
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
-    
-    formatter = logging.Formatter(
-        "[%(asctime)s] [%(levelname)s] [%(name)s] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+        handler.close()
     
     console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
+    console_handler.setFormatter(_FORMATTER)
     console_handler.setLevel(level)
     logger.addHandler(console_handler)
     
@@ -38,17 +50,20 @@ def setup_logger(
         log_file = os.path.expanduser(log_file)
         
         log_dir = os.path.dirname(log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
         
+        # delay=True: 直到第一次写日志时才打开文件
         file_handler = RotatingFileHandler(
             log_file,
             maxBytes=max_size_mb * 1024 * 1024,
             backupCount=backup_count,
-            encoding="utf-8"
+            encoding="utf-8",
+            delay=True
         )
-        file_handler.setFormatter(formatter)
+        file_handler.setFormatter(_FORMATTER)
         file_handler.setLevel(level)
         logger.addHandler(file_handler)
     
-    return logger 
\ No newline at end of file
+    _current_settings = settings
+    return logger
\ No newline at end of file
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+响应缓存模块
+将API响应按内容哈希缓存到磁盘，避免重复请求
+"""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Any, Optional
+
+
+class ResponseCache:
+    """基于SHA-256键的磁盘响应缓存"""
+
+    def __init__(self, cache_dir: str, enabled: bool = True, logger=None):
+        """初始化缓存"""
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.enabled = enabled
+        self.logger = logger or logging.getLogger("response_cache")
+
+        if self.enabled:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+            except OSError as e:
+                self.logger.warning(f"无法创建缓存目录，已禁用缓存: {e}")
+                self.enabled = False
+
+    @staticmethod
+    def make_key(*parts: str) -> str:
+        """根据若干字段生成缓存键"""
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        """获取缓存键对应的文件路径"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中时返回None"""
+        if not self.enabled:
+            return None
+
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"读取缓存失败: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        """写入缓存，先写临时文件再原子替换"""
+        if not self.enabled:
+            return
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(value, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            self.logger.warning(f"写入缓存失败: {e}")
+
+    def clear(self) -> int:
+        """清除所有缓存，返回删除的条目数"""
+        removed = 0
+
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return 0
+
+        for name in names:
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                    removed += 1
+                except OSError as e:
+                    self.logger.warning(f"删除缓存文件失败: {e}")
+
+        return removed
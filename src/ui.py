@@ -7,25 +7,123 @@
 """
 
 import os
+import re
 import sys
 import time
 import logging
+import functools
 from typing import Optional, List, Dict, Any, Union, Callable
-from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.completion import WordCompleter
-from prompt_toolkit.styles import Style
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.syntax import Syntax
+from rich.text import Text
 from rich.theme import Theme
-from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+# prompt_toolkit、rich.markdown、rich.syntax、rich.progress 导入较慢，在用到的方法中再导入
 
 from config import Config
 
 
+# 深色主题
+_DARK_THEME = Theme({
+    "info": "cyan",
+    "warning": "yellow",
+    "error": "bold red",
+    "success": "bold green",
+    "command": "yellow",
+    "result": "green",
+    "highlight": "bold cyan",
+})
+
+# 浅色主题
+_LIGHT_THEME = Theme({
+    "info": "blue",
+    "warning": "orange3",
+    "error": "red",
+    "success": "green",
+    "command": "dark_orange",
+    "result": "dark_green",
+    "highlight": "cyan",
+})
+
+
+# Markdown常用标记字符，结果中不含这些字符时无需交给Markdown解析器
+_MD_RE = re.compile(r"[`#*_\[>]")
+
+# 命令状态对应的颜色，以及预先拼好的状态标记
+_STATUS_COLORS = {
+    "进行中": "yellow",
+    "成功": "green",
+    "失败": "red",
+    "超时": "red",
+    "取消": "yellow"
+}
+_STATUS_MARKUP = {status: f"[{color}]{status}[/{color}]" for status, color in _STATUS_COLORS.items()}
+
+
+# 欢迎界面内容固定不变，标记在模块加载时解析一次
+_WELCOME_LOGO = r"""
+  _      _                      _                     _   
+ | |    (_)_ __  _   ___  __   / \   __ _  ___ _ __ | |_ 
+ | |    | | '_ \| | | \ \/ /  / _ \ / _` |/ _ \ '_ \| __|
+ | |___ | | | | | |_| |>  <  / ___ \ (_| |  __/ | | | |_ 
+ |_____|_|_| |_|\__,_/_/\_\/_/   \_\__, |\___|_| |_|\__|
+                                    |___/                
+        """
+
+_WELCOME_VERSION_INFO = """
+┌─────────────────────────────────────────────────────┐
+│ [bold green]LinuxAgent[/bold green] - 基于DeepSeek API的智能Linux运维助手    │
+│                                                     │
+│ [bold]Version:[/bold] [yellow]1.4.1[/yellow]                                      │
+└─────────────────────────────────────────────────────┘
+        """
+
+_WELCOME_BANNER = Group(
+    Text(_WELCOME_LOGO, style="bold blue"),
+    Text.from_markup(_WELCOME_VERSION_INFO),
+    Text.from_markup("\n[bold]输入命令获取帮助:[/bold] [cyan]help[/cyan]"),
+    Text.from_markup("[bold]要退出程序，请输入:[/bold] [cyan]exit[/cyan]"),
+    Text.from_markup("\n[bold yellow]请描述您需要的Linux运维任务，LinuxAgent将协助您完成。[/bold yellow]\n")
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _syntax_lexer(name: str):
+    """获取Pygments词法分析器，每种语言只创建一次"""
+    from pygments.lexers import get_lexer_by_name
+    return get_lexer_by_name(name)
+
+
+@functools.lru_cache(maxsize=None)
+def _syntax_theme(name: str):
+    """获取语法高亮主题，复用同一实例以保留其样式缓存"""
+    from rich.syntax import Syntax
+    return Syntax.get_theme(name)
+
+
+def _print_cmd_info(console, command, start_time, end_time=None, status="进行中"):
+    """打印命令执行相关信息，供两个界面类共用"""
+    if end_time:
+        duration = end_time - start_time
+        duration_str = f"{duration:.2f}秒"
+        if duration > 60:
+            minutes = int(duration // 60)
+            seconds = int(duration % 60)
+            duration_str = f"{minutes}分{seconds}秒"
+    else:
+        duration_str = f"{time.time() - start_time:.2f}秒"
+    
+    status_markup = _STATUS_MARKUP.get(status)
+    if status_markup is None:
+        status_markup = f"[white]{status}[/white]"
+    
+    console.print(
+        f"[bold]命令:[/bold] [yellow]{command}[/yellow]\n"
+        f"[bold]状态:[/bold] {status_markup}\n"
+        f"[bold]耗时:[/bold] {duration_str}"
+    )
+
+
 class UI:
     """用户界面类，处理与用户的交互"""
 
@@ -37,47 +135,32 @@ class UI:
             config: 配置对象
         """
         self.config = config
-        self.console = Console()
         self.logger = logging.getLogger(__name__)
         self._setup_theme()
+        
+        # 导入readline后 input() 即支持行编辑和历史记录；部分平台没有该模块
+        try:
+            import readline  # noqa: F401
+        except ImportError:
+            pass
 
     def _setup_theme(self):
         """设置控制台主题"""
         # 根据配置设置主题
-        if self.config.ui.theme == "dark":
-            # 深色主题
-            theme = Theme({
-                "info": "cyan",
-                "warning": "yellow",
-                "error": "bold red",
-                "success": "bold green",
-                "command": "yellow",
-                "result": "green",
-                "highlight": "bold cyan",
-            })
-        else:
-            # 浅色主题
-            theme = Theme({
-                "info": "blue",
-                "warning": "orange3",
-                "error": "red",
-                "success": "green",
-                "command": "dark_orange",
-                "result": "dark_green",
-                "highlight": "cyan",
-            })
-        
+        theme = _DARK_THEME if self.config.ui.theme == "dark" else _LIGHT_THEME
         self.console = Console(theme=theme)
         
     def show_welcome(self):
         """显示欢迎信息"""
-        self.console.print(Panel.fit(
-            "[bold]LinuxAgent[/bold] - 你的Linux命令助手\n"
-            "输入自然语言描述，获取相应的Linux命令",
-            title="欢迎使用",
-            border_style="cyan"
-        ))
-        self.console.print("输入 [bold]exit[/bold] 或 [bold]quit[/bold] 退出程序\n")
+        # 在控制台缓冲区中输出，退出上下文时一次写入终端
+        with self.console:
+            self.console.print(Panel.fit(
+                "[bold]LinuxAgent[/bold] - 你的Linux命令助手\n"
+                "输入自然语言描述，获取相应的Linux命令",
+                title="欢迎使用",
+                border_style="cyan"
+            ))
+            self.console.print("输入 [bold]exit[/bold] 或 [bold]quit[/bold] 退出程序\n")
         
     def show_thinking(self):
         """显示正在思考的提示"""
@@ -103,31 +186,32 @@ class UI:
         recommendations = result.get("recommendations", [])
         next_steps = result.get("next_steps", [])
         
-        content = []
+        # 直接构建Text对象，API返回的内容按纯文本显示，不再经过标记解析
+        parts = []
         
         if explanation:
-            content.append(f"[bold]分析:[/bold] {explanation}")
+            parts.append(Text.assemble(("分析:", "bold"), " ", explanation))
             
         if recommendations:
-            content.append("\n[bold]建议:[/bold]")
+            parts.append(Text.assemble("\n", ("建议:", "bold")))
             for i, rec in enumerate(recommendations, 1):
-                content.append(f"  {i}. {rec}")
+                parts.append(Text(f"  {i}. {rec}"))
                 
         if next_steps:
-            content.append("\n[bold]下一步操作:[/bold]")
+            parts.append(Text.assemble("\n", ("下一步操作:", "bold")))
             for i, step in enumerate(next_steps, 1):
                 step_cmd = step.get("command", "")
                 step_explanation = step.get("explanation", "")
                 
                 if step_cmd:
-                    content.append(f"  {i}. [yellow]{step_cmd}[/yellow]")
+                    parts.append(Text.assemble(f"  {i}. ", (step_cmd, "yellow")))
                     if step_explanation:
-                        content.append(f"     {step_explanation}")
+                        parts.append(Text(f"     {step_explanation}"))
                 elif step_explanation:
-                    content.append(f"  {i}. {step_explanation}")
+                    parts.append(Text(f"  {i}. {step_explanation}"))
                     
         self.console.print(Panel(
-            "\n".join(content),
+            Group(*parts),
             title="执行结果分析",
             border_style="green"
         ))
@@ -139,6 +223,10 @@ class UI:
         Args:
             message: 错误信息
         """
+        # 输出未连接终端时不需要样式，直接写入纯文本
+        if not self.console.is_terminal:
+            sys.stderr.write(f"{message}\n")
+            return
         self.console.print(f"[error]{message}[/error]")
         
     def get_user_input(self, prompt="请输入你的需求："):
@@ -187,11 +275,15 @@ class UI:
         Returns:
             任务函数的返回值
         """
+        from rich.progress import Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+        
         with Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             TimeElapsedColumn(),
             transient=True,
+            # 降低刷新频率，短任务不必频繁重绘旋转图标，也减少写入终端的数据量
+            refresh_per_second=4,
         ) as progress:
             task_id = progress.add_task(f"[cyan]{message}[/cyan]", total=None)
             result = task_fn(*args, **kwargs)
@@ -209,9 +301,11 @@ class UI:
         Returns:
             用户选择的索引，如果取消则返回None
         """
-        self.console.print(f"[bold]{title}[/bold]")
+        body = Text()
+        body.append(title, style="bold")
         for i, option in enumerate(options, 1):
-            self.console.print(f"  {i}. {option}")
+            body.append(f"\n  {i}. {option}")
+        self.console.print(body)
             
         try:
             while True:
@@ -241,27 +335,7 @@ class UI:
             end_time: 结束时间，如果为None表示命令仍在执行
             status: 命令状态
         """
-        if end_time:
-            duration = end_time - start_time
-            duration_str = f"{duration:.2f}秒"
-            if duration > 60:
-                minutes = int(duration // 60)
-                seconds = int(duration % 60)
-                duration_str = f"{minutes}分{seconds}秒"
-        else:
-            duration_str = f"{time.time() - start_time:.2f}秒"
-            
-        status_color = {
-            "进行中": "yellow",
-            "成功": "green",
-            "失败": "red",
-            "超时": "red",
-            "取消": "yellow"
-        }.get(status, "white")
-        
-        self.console.print(f"[bold]命令:[/bold] [yellow]{command}[/yellow]")
-        self.console.print(f"[bold]状态:[/bold] [{status_color}]{status}[/{status_color}]")
-        self.console.print(f"[bold]耗时:[/bold] {duration_str}")
+        _print_cmd_info(self.console, command, start_time, end_time, status)
 
 
 class ConsoleUI:
@@ -274,6 +348,12 @@ class ConsoleUI:
         Args:
             config: UI配置
         """
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.history import FileHistory
+        from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+        from prompt_toolkit.styles import Style
+        from prompt_toolkit.completion import WordCompleter
+        
         self.config = config
         
         self.console = Console()
@@ -286,8 +366,8 @@ class ConsoleUI:
         
         history_file = os.path.expanduser(config.history_file)
         history_dir = os.path.dirname(history_file)
-        if history_dir and not os.path.exists(history_dir):
-            os.makedirs(history_dir)
+        if history_dir:
+            os.makedirs(history_dir, exist_ok=True)
             
         self.session = PromptSession(
             history=FileHistory(history_file),
@@ -302,32 +382,11 @@ class ConsoleUI:
             'ls', 'ps', 'df', 'top', 'systemctl', 'journalctl',
             'find', 'grep', 'awk', 'sed', 'cat', 'tail', 'netstat'
         ]
+        self.command_completer = WordCompleter(self.common_commands, ignore_case=True)
         
     def welcome(self):
         """显示欢迎信息"""
-        logo = r"""
-  _      _                      _                     _   
- | |    (_)_ __  _   ___  __   / \   __ _  ___ _ __ | |_ 
- | |    | | '_ \| | | \ \/ /  / _ \ / _` |/ _ \ '_ \| __|
- | |___ | | | | | |_| |>  <  / ___ \ (_| |  __/ | | | |_ 
- |_____|_|_| |_|\__,_/_/\_\/_/   \_\__, |\___|_| |_|\__|
-                                    |___/                
-        """
-        
-        version_info = """
-┌─────────────────────────────────────────────────────┐
-│ [bold green]LinuxAgent[/bold green] - 基于DeepSeek API的智能Linux运维助手    │
-│                                                     │
-│ [bold]Version:[/bold] [yellow]1.4.1[/yellow]                                      │
-└─────────────────────────────────────────────────────┘
-        """
-        
-        self.console.print(f"[bold blue]{logo}[/bold blue]")
-        self.console.print(version_info)
-        
-        self.console.print("\n[bold]输入命令获取帮助:[/bold] [cyan]help[/cyan]")
-        self.console.print("[bold]要退出程序，请输入:[/bold] [cyan]exit[/cyan]")
-        self.console.print("\n[bold yellow]请描述您需要的Linux运维任务，LinuxAgent将协助您完成。[/bold yellow]\n")
+        self.console.print(_WELCOME_BANNER)
         
     def get_input(self, prompt_text="[LinuxAgent] > ") -> str:
         """
@@ -339,38 +398,73 @@ class ConsoleUI:
         Returns:
             用户输入
         """
-        command_completer = WordCompleter(self.common_commands, ignore_case=True)
-        
         user_input = self.session.prompt(
             f"\n{prompt_text} ",
-            completer=command_completer
+            completer=self.command_completer
         )
         return user_input.strip()
     
     def show_thinking(self):
-        """显示思考中的动画"""
-        with self.console.status("[bold green]思考中...[/bold green]", spinner="dots"):
-            time.sleep(0.1)  
-            # 实际使用时会被阻塞直到AI响应
+        """
+        创建思考中的动画，调用方在等待AI响应期间进入该上下文
+        
+        Returns:
+            状态动画的上下文管理器
+        """
+        return self.console.status("[bold green]思考中...[/bold green]", spinner="dots")
+            
+    def show_command_plan(self, explanation: str, command: str):
+        """
+        显示对用户需求的理解和将要执行的命令
+        
+        Args:
+            explanation: 命令解释
+            command: 将要执行的命令
+        """
+        self.console.print(Panel(Group(
+            Text.assemble(("理解: ", "bold"), explanation),
+            Text.assemble(("要执行的命令: ", "bold"), (command, "yellow"))
+        )))
             
-    def show_result(self, result: str, command: Optional[str] = None):
+    def show_result(self, result: str, command: Optional[str] = None, plain: bool = False):
         """
         显示结果
         
         Args:
             result: 结果文本
             command: 执行的命令(如果有)
+            plain: 是否按原样输出结果(命令的原始输出不应按Markdown解析)
         """
+        from rich.markdown import Markdown
+        from rich.syntax import Syntax
+        
+        # 先组装好全部内容，一次输出到终端
+        renderables = []
         if command:
-            self.console.print("[bold]执行命令:[/bold]", style="yellow")
-            self.console.print(Syntax(command, "bash", theme="monokai"))
+            renderables.append(Text.from_markup("[bold]执行命令:[/bold]", style="yellow"))
+            renderables.append(Syntax(command, _syntax_lexer("bash"), theme=_syntax_theme("monokai")))
             
         if result:
-            self.console.print("[bold]执行结果:[/bold]", style="green")
+            renderables.append(Text.from_markup("[bold]执行结果:[/bold]", style="green"))
             try:
-                self.console.print(Markdown(result))
+                if plain:
+                    renderables.append(Text(result))
+                elif _MD_RE.search(result):
+                    renderables.append(Markdown(result))
+                else:
+                    renderables.append(result)
             except:
-                self.console.print(result)
+                renderables.append(result)
+        
+        if renderables:
+            try:
+                self.console.print(Group(*renderables))
+            except:
+                # Markdown在渲染时才真正出错，此时退回为纯文本重新输出
+                if not result:
+                    raise
+                renderables[-1] = Text(result)
+                self.console.print(Group(*renderables))
     
     def show_error(self, error_message: str):
         """
@@ -379,6 +473,10 @@ class ConsoleUI:
         Args:
             error_message: 错误信息
         """
+        # 输出未连接终端时不需要样式，直接写入纯文本
+        if not self.console.is_terminal:
+            sys.stderr.write(f"错误: {error_message}\n")
+            return
         self.console.print(f"[bold red]错误:[/bold red] {error_message}")
     
     def confirm(self, message: str) -> bool:
@@ -398,6 +496,8 @@ class ConsoleUI:
     
     def show_help(self):
         """显示帮助信息"""
+        from rich.markdown import Markdown
+        
         help_text = """
 # LinuxAgent 使用帮助
 
@@ -413,6 +513,7 @@ class ConsoleUI:
 - `clear`: 清屏
 - `history`: 显示历史记录
 - `config`: 显示当前配置
+- `invalidate`: 清除API响应缓存
 
 ## 安全提示
 对于潜在危险的操作，LinuxAgent会请求您的确认。
@@ -430,9 +531,11 @@ class ConsoleUI:
         Args:
             entries: 历史记录条目
         """
-        self.console.print("[bold]历史记录:[/bold]", style="blue")
+        body = Text()
+        body.append("历史记录:", style="bold blue")
         for i, entry in enumerate(entries, 1):
-            self.console.print(f"{i:3d}. {entry}")
+            body.append(f"\n{i:3d}. {entry}")
+        self.console.print(body)
     
     def show_config(self, config: Dict[str, Any]):
         """
@@ -441,14 +544,20 @@ class ConsoleUI:
         Args:
             config: 配置字典
         """
-        self.console.print("[bold]当前配置:[/bold]", style="blue")
-        # 隐藏API密钥
+        # 隐藏API密钥，只复制需要修改的部分，不改动调用方的配置
         if 'api' in config and 'api_key' in config['api']:
-            config['api']['api_key'] = '********'
+            config = dict(config)
+            config['api'] = {**config['api'], 'api_key': '********'}
             
         import yaml
-        config_yaml = yaml.dump(config, default_flow_style=False)
-        self.console.print(Syntax(config_yaml, "yaml", theme="monokai"))
+        from rich.syntax import Syntax
+        
+        # 安装了libyaml时使用C实现的输出器
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+        config_yaml = yaml.dump(config, Dumper=dumper, default_flow_style=False, sort_keys=False)
+        with self.console:
+            self.console.print("[bold]当前配置:[/bold]", style="blue")
+            self.console.print(Syntax(config_yaml, _syntax_lexer("yaml"), theme=_syntax_theme("monokai")))
     
     def print_command_execution_info(self, command, start_time, end_time=None, status="进行中"):
         """
@@ -460,24 +569,4 @@ class ConsoleUI:
             end_time: 结束时间，如果为None表示命令仍在执行
             status: 命令状态
         """
-        if end_time:
-            duration = end_time - start_time
-            duration_str = f"{duration:.2f}秒"
-            if duration > 60:
-                minutes = int(duration // 60)
-                seconds = int(duration % 60)
-                duration_str = f"{minutes}分{seconds}秒"
-        else:
-            duration_str = f"{time.time() - start_time:.2f}秒"
-            
-        status_color = {
-            "进行中": "yellow",
-            "成功": "green",
-            "失败": "red",
-            "超时": "red",
-            "取消": "yellow"
-        }.get(status, "white")
-        
-        self.console.print(f"[bold]命令:[/bold] [yellow]{command}[/yellow]")
-        self.console.print(f"[bold]状态:[/bold] [{status_color}]{status}[/{status_color}]")
-        self.console.print(f"[bold]耗时:[/bold] {duration_str}") 
+        _print_cmd_info(self.console, command, start_time, end_time, status) 
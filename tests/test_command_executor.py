@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令执行模块测试
+"""
+
+import logging
+import unittest
+from types import SimpleNamespace
+
+from src.command_executor import CommandExecutor
+
+
+def _make_executor() -> CommandExecutor:
+    """创建不带安全规则的命令执行器"""
+    security_config = SimpleNamespace(confirm_dangerous_commands=True, blocked_commands=[], confirm_patterns=[])
+    return CommandExecutor(security_config, logger=logging.getLogger("test_command_executor"))
+
+
+class ExecuteCommandTest(unittest.TestCase):
+    """execute_command 的回归测试"""
+
+    def setUp(self):
+        self.executor = _make_executor()
+
+    def test_shell_builtins_run_through_shell(self):
+        for command in ("command -v sh", "! false", "true"):
+            with self.subTest(command=command):
+                _, _, return_code = self.executor.execute_command(command)
+                self.assertEqual(return_code, 0)
+
+    def test_missing_program_returns_127(self):
+        _, stderr, return_code = self.executor.execute_command("linuxagent-no-such-program")
+        self.assertEqual(return_code, 127)
+        self.assertIn("not found", stderr)
+
+
+class InteractiveCommandTest(unittest.TestCase):
+    """_is_interactive_command 的回归测试"""
+
+    def setUp(self):
+        self.executor = _make_executor()
+
+    def test_interactive_commands(self):
+        for command in ("sudo -u postgres psql", "sudo -E vim /etc/hosts", "sudo -i", "sudo -u postgres -i",
+                        "docker exec -it web bash", "kubectl exec -it pod -- sh", "podman exec -ti c sh",
+                        "ls | less", "tail -f /var/log/syslog"):
+            with self.subTest(command=command):
+                self.assertTrue(self.executor._is_interactive_command(command))
+
+    def test_non_interactive_commands(self):
+        for command in ("sudo apt update", "sudo -u www-data ls", "sudo -i ls", "docker exec web ls",
+                        "kubectl exec pod -- ls -t", "cat /etc/ssh/sshd_config"):
+            with self.subTest(command=command):
+                self.assertFalse(self.executor._is_interactive_command(command))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DeepSeek API客户端测试
+"""
+
+import json
+import logging
+import unittest
+from types import SimpleNamespace
+
+from src.deepseek_api import DeepSeekAPI, _json_loads
+
+
+def _make_api() -> DeepSeekAPI:
+    """创建不发起网络请求的API客户端"""
+    api_config = SimpleNamespace(api_key="test", base_url="http://localhost", model="test", timeout=1)
+    return DeepSeekAPI(api_config, logger=logging.getLogger("test_deepseek_api"))
+
+
+class ParseTextResponseTest(unittest.TestCase):
+    """_parse_text_response 的回归测试"""
+
+    def setUp(self):
+        self.api = _make_api()
+
+    def test_danger_value_on_next_line(self):
+        result = self.api._parse_text_response("命令: rm -rf /tmp/build\n危险:\n是，会删除目录")
+        self.assertEqual(result["command"], "rm -rf /tmp/build")
+        self.assertTrue(result["dangerous"])
+
+    def test_reason_value_on_next_line(self):
+        result = self.api._parse_text_response("命令: rm -rf /tmp/build\n危险: 是\n原因:\n\n删除整个目录")
+        self.assertTrue(result["dangerous"])
+        self.assertEqual(result["reason_if_dangerous"], "删除整个目录")
+
+    def test_empty_fence_does_not_override_labelled_command(self):
+        result = self.api._parse_text_response("```bash\n```\n命令: ls -la")
+        self.assertEqual(result["command"], "ls -la")
+
+    def test_indented_closing_fence(self):
+        result = self.api._parse_text_response("```bash\n  ls -la\n  ```\n解释: 列出文件")
+        self.assertEqual(result["command"], "ls -la")
+        self.assertEqual(result["explanation"], "列出文件")
+
+    def test_fence_skips_comment_lines(self):
+        result = self.api._parse_text_response("```bash\n# 列出文件\nls -la\n```\n危险: 否")
+        self.assertEqual(result["command"], "ls -la")
+        self.assertFalse(result["dangerous"])
+
+
+class JsonLoadsTest(unittest.TestCase):
+    """_json_loads 的回归测试"""
+
+    def test_accepts_what_json_accepts(self):
+        result = _json_loads(b'{"a": NaN, "b": Infinity, "c": "\\ud800"}')
+        self.assertNotEqual(result["a"], result["a"])
+        self.assertEqual(result["b"], float("inf"))
+        self.assertEqual(result["c"], "\ud800")
+
+    def test_invalid_json_raises_json_error(self):
+        with self.assertRaises(json.JSONDecodeError):
+            _json_loads("{bad")
+
+
+if __name__ == "__main__":
+    unittest.main()